@@ -3,8 +3,12 @@ import os
 from werkzeug.utils import secure_filename
 from loguru import logger
 import cv2
-import requests
 import easyocr
+from ocr_pool import get_reader_pool
+from ocr_workers import OCR_BUSY_RETRY_AFTER_S, OCRBusy
+from ocr_profiles import get_profile, readtext_kwargs
+from plate_verification import get_verification_client
+from upload_io import decode_image_bytes, load_image, save_upload_async
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 UPLOAD_FOLDER = './uploads'
@@ -17,12 +21,16 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 # Função para desenhar as caixas delimitadoras na imagem
-def draw_boxes(image_path, results):
-    image = cv2.imread(image_path)
+def draw_boxes(image, results, filename=None):
+    # Aceita o array já decodificado (desenha sobre uma cópia) ou um caminho
+    if filename is None:
+        filename = os.path.basename(image)
+    image = load_image(image)
 
     if image is None:
-        logger.error(f'Erro ao carregar a imagem: {image_path}')
+        logger.error(f'Erro ao carregar a imagem: {filename}')
         return None
+    image = image.copy()
 
     for result in results:
         try:
@@ -42,17 +50,18 @@ def draw_boxes(image_path, results):
         os.makedirs(output_folder)
 
     # Define o caminho de saída para a imagem
-    output_path = os.path.join(output_folder, os.path.basename(image_path))
+    output_path = os.path.join(output_folder, filename)
     cv2.imwrite(output_path, image)
     return output_path
 
 # Função para realizar OCR e filtragem de texto da placa
 class PlateDataAnalysis:
-    def __init__(self):
-        self.reader = easyocr.Reader(['pt', 'en'])
+    def __init__(self, reader=None):
+        # Usa um leitor do pool quando fornecido; senão carrega um novo
+        self.reader = reader if reader is not None else easyocr.Reader(get_profile()['languages'])
 
-    def read_text_from_image(self, image_path, decoder='beamsearch'):
-        results = self.reader.readtext(image_path, decoder=decoder)
+    def read_text_from_image(self, image, decoder='beamsearch'):
+        results = self.reader.readtext(image, decoder=decoder, **readtext_kwargs())
         logger.info(f'OCR results: {results}')
         return results
 
@@ -70,14 +79,11 @@ class PlateDataAnalysis:
 
 # Função para verificar a placa no Adonis js
 def check_plate_in_database(plate):
-    try:
-        response = requests.get(f'http://localhost:3555/search-plate?plate={plate}')
-        data = response.json()
-        logger.info(f'Entrou na verificação de placas')
-        return data.get('message') == 'Placa cadastrada'
-    except requests.RequestException as e:
-        logger.error(f'Erro ao verificar placa: {e}')
-        return False
+    return get_verification_client().check(plate)
+
+# Verifica em paralelo todas as placas candidatas (com cache e conexões reaproveitadas)
+def check_plates_in_database(plates):
+    return get_verification_client().verify_many(plates)
 
 @app.route('/upload', methods=['POST'])
 def upload_image():
@@ -92,27 +98,36 @@ def upload_image():
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        logger.info(f'Image saved at {file_path}')
 
-        # Processar a imagem e realiza OCR
-        plate_analysis = PlateDataAnalysis()
-        texts = plate_analysis.read_text_from_image(file_path, 'beamsearch')
-        text_plate = plate_analysis.filter_plates(texts)
+        # Decodifica o upload uma única vez em memória; gravar em disco é opcional e assíncrono
+        data = file.read()
+        image = decode_image_bytes(data)
+        if image is None:
+            return jsonify({'error': 'Failed to decode image'}), 400
+        save_upload_async(data, file_path)
+
+        # Processar a imagem e realiza OCR com um leitor do pool
+        with get_reader_pool().reader() as reader:
+            plate_analysis = PlateDataAnalysis(reader)
+            texts = plate_analysis.read_text_from_image(image, 'beamsearch')
+            text_plate = plate_analysis.filter_plates(texts)
 
         # Verificar se as placas estão cadastradas na API
         plate_verifications = []
         if text_plate:
+            verification_results = check_plates_in_database([plate['text'] for plate in text_plate])
             for plate in text_plate:
-                verification_result = check_plate_in_database(plate['text'])
+                result = verification_results[plate['text']]
                 plate_verifications.append({
                     'plate': plate['text'],
                     'confidence': plate['confidence'],
-                    'verification': verification_result
+                    'verification': result['verification'],
+                    'match': result['match'],
+                    'distance': result['distance']
                 })
 
         # Desenhar caixas nas letras detectadas
-        output_image_path = draw_boxes(file_path, texts)
+        output_image_path = draw_boxes(image, texts, filename)
 
         if output_image_path is None:
             return jsonify({'error': 'Failed to process image'}), 500
@@ -127,6 +142,17 @@ def upload_image():
 
     return jsonify({'error': 'File type not allowed'}), 400
 
+# Sem leitor OCR livre no tempo limite: o cliente tenta de novo em vez de receber 500
+@app.errorhandler(OCRBusy)
+def ocr_busy(error):
+    logger.warning(f'OCR ocupado: {error}')
+    return jsonify({'error': 'OCR is busy, try again later'}), 503, {'Retry-After': str(OCR_BUSY_RETRY_AFTER_S)}
+
+# Rota com as métricas do pool de leitores OCR
+@app.route('/ocr-pool')
+def ocr_pool_metrics():
+    return jsonify(get_reader_pool().metrics()), 200
+
 # Rota para servir arquivos de imagem carregados
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
@@ -142,4 +168,9 @@ if __name__ == '__main__':
         os.makedirs(UPLOAD_FOLDER)
     if not os.path.exists('./outputs'):
         os.makedirs('./outputs')
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Carrega e aquece os leitores OCR antes de aceitar requisições
+    get_reader_pool()
+    # Carrega o índice local de placas (quando PLATE_INDEX_URL estiver configurado)
+    get_verification_client()
+    # Sem o recarregador do modo debug, que executaria este bloco de novo e carregaria um segundo pool
+    app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=False)
@@ -0,0 +1,105 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from werkzeug.utils import secure_filename
+
+from ocr_workers import OCR_BUSY_RETRY_AFTER_S, OCRBusy
+from pipeline_metrics import stage, track_request
+from plate_verification import get_verification_client
+from vTratamento import UPLOAD_FOLDER, UploadRequest, allowed_file, collect_metrics, warm_up
+
+# Threads que executam as etapas síncronas (decodificação, OCR, caixas); o OCR em si fica
+# limitado pelo pool de leitores ou pelos processos de OCR
+ASGI_EXECUTOR_THREADS = int(os.environ.get('ASGI_EXECUTOR_THREADS', 8))
+
+_executor = ThreadPoolExecutor(max_workers=ASGI_EXECUTOR_THREADS, thread_name_prefix='asgi-ocr')
+
+
+# Executa no executor com o contexto atual, para que as etapas entrem nos tempos da requisição
+async def _in_executor(func, *args):
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(_executor, context.run, func, *args)
+
+
+# Mesmo contrato do /upload do Flask; o corpo é lido de forma assíncrona, então uploads lentos
+# não ocupam nenhuma thread enquanto chegam
+async def upload_image(request):
+    with track_request() as timings:
+        response, status = await _process(request)
+        response['timings'] = timings.as_dict()
+    return JSONResponse(response, status)
+
+
+async def _process(request):
+    with stage('receive'):
+        form = await request.form()
+    file = form.get('image')
+    if file is None or isinstance(file, str):
+        return {'error': 'No image part in the request'}, 400
+    if not file.filename:
+        return {'error': 'No selected file'}, 400
+    if not allowed_file(file.filename):
+        return {'error': 'File type not allowed'}, 400
+    with stage('receive'):
+        data = await file.read()
+
+    # Câmera informada pelo cabeçalho X-Camera-Id ou pelo campo camera_id
+    camera_id = request.headers.get('X-Camera-Id') or form.get('camera_id')
+    upload = UploadRequest(data, secure_filename(file.filename), camera_id,
+                           request.client.host if request.client else None,
+                           request.query_params.get('debug') == '1')
+
+    early = await _in_executor(upload.prepare)
+    if early is not None:
+        return early
+
+    await _in_executor(upload.run_ocr)
+
+    # Verificação das placas com o cliente HTTP assíncrono (ou o índice local)
+    plates = upload.plate_texts()
+    with stage('verify'):
+        verification_results = await get_verification_client().averify_many(plates) if plates else {}
+
+    return await _in_executor(
+        upload.finish, verification_results, lambda name: str(request.url_for('output_file', path=name)))
+
+
+# Sem leitor nem processo de OCR livre no tempo limite: o cliente tenta de novo em vez de receber 500
+async def ocr_busy(request, exc):
+    logger.warning(f'OCR ocupado: {exc}')
+    return JSONResponse({'error': 'OCR is busy, try again later'}, 503,
+                        headers={'Retry-After': str(OCR_BUSY_RETRY_AFTER_S)})
+
+
+async def metrics(request):
+    return PlainTextResponse(await _in_executor(collect_metrics), media_type='text/plain; version=0.0.4')
+
+
+async def startup():
+    await _in_executor(warm_up)
+    logger.info('Servidor ASGI pronto')
+
+
+app = Starlette(
+    routes=[
+        Route('/upload', upload_image, methods=['POST']),
+        Route('/metrics', metrics),
+        Mount('/uploads', StaticFiles(directory=UPLOAD_FOLDER, check_dir=False), name='uploaded_file'),
+        Mount('/outputs', StaticFiles(directory='./outputs', check_dir=False), name='output_file'),
+    ],
+    exception_handlers={OCRBusy: ocr_busy},
+    on_startup=[startup],
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host='0.0.0.0', port=5001)
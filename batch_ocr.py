@@ -0,0 +1,169 @@
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+from loguru import logger
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mkv', '.mov', '.mjpeg', '.h264'}
+
+_analysis = None
+
+
+# Expande diretórios (recursivamente), globs e arquivos em uma sequência de caminhos
+def iter_paths(sources):
+    for source in sources:
+        if os.path.isdir(source):
+            for folder, _, files in os.walk(source):
+                for name in sorted(files):
+                    yield os.path.join(folder, name)
+        elif os.path.exists(source):
+            yield source
+        else:
+            yield from sorted(glob.glob(source, recursive=True))
+
+
+# Itens a processar: (id, caminho da imagem ou quadro do vídeo, metadados)
+def iter_items(sources, video_step=1):
+    for path in iter_paths(sources):
+        extension = os.path.splitext(path)[1].lower()
+        if extension in IMAGE_EXTENSIONS:
+            # A imagem é lida no processo de OCR; só o caminho atravessa o pool
+            yield path, path, {'source': path}
+        elif extension in VIDEO_EXTENSIONS:
+            capture = cv2.VideoCapture(path)
+            index = 0
+            while True:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                if index % video_step == 0:
+                    yield (f'{path}#frame={index}', frame,
+                           {'source': path, 'frame': index, 'timestamp_ms': capture.get(cv2.CAP_PROP_POS_MSEC)})
+                index += 1
+            capture.release()
+
+
+# Inicializa o processo: limita as threads do PyTorch e carrega um leitor uma única vez
+def _init_worker(threads):
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['MKL_NUM_THREADS'] = str(threads)
+    global _analysis
+    from plate_analysis import PlateDataAnalysis
+    _analysis = PlateDataAnalysis()
+
+
+def _process(item_id, image, meta):
+    start = time.perf_counter()
+    record = dict(meta, id=item_id)
+    try:
+        if isinstance(image, str):
+            image = cv2.imread(image)
+            if image is None:
+                raise ValueError('imagem não pôde ser lida')
+        texts = _analysis.read_text_from_image(image)
+        plates = _analysis.filter_plates(texts) or []
+        record.update({
+            'plates': [{'text': plate['text'], 'confidence': plate['confidence'], 'format': plate['format']}
+                       for plate in plates],
+            'texts': [{'text': text, 'confidence': float(confidence)} for _, text, confidence in texts],
+            'localization': _analysis.localization_tier,
+        })
+    except Exception as e:
+        record['error'] = repr(e)
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    return record
+
+
+# Ids já presentes na saída: o próprio JSONL serve de ponto de retomada
+def load_checkpoint(path):
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['id'])
+            except (ValueError, KeyError):
+                continue  # linha incompleta de uma execução interrompida
+    return done
+
+
+def write_parquet(jsonl_path, parquet_path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        logger.error('pyarrow não está instalado; a saída ficou apenas em JSONL')
+        return
+    with open(jsonl_path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    pq.write_table(pa.Table.from_pylist(records), parquet_path)
+    logger.info(f'{len(records)} registros gravados em {parquet_path}')
+
+
+def run(sources, output, workers, video_step=1, max_pending=None):
+    done = load_checkpoint(output)
+    if done:
+        logger.info(f'Retomando: {len(done)} itens já processados em {output}')
+    max_pending = max_pending or workers * 2
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    processed = failed = reported = 0
+    start = time.perf_counter()
+
+    with open(output, 'a') as out, ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'),
+                                                       initializer=_init_worker, initargs=(threads,)) as pool:
+        pending = set()
+
+        def drain(return_when):
+            nonlocal processed, failed
+            finished, still_pending = wait(pending, return_when=return_when)
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(record) + '\n')
+                processed += 1
+                failed += 'error' in record
+            out.flush()
+            return still_pending
+
+        for item_id, image, meta in iter_items(sources, video_step):
+            if item_id in done:
+                continue
+            # Limita os itens em trânsito para não decodificar o vídeo inteiro na memória
+            if len(pending) >= max_pending:
+                pending = drain(FIRST_COMPLETED)
+            pending.add(pool.submit(_process, item_id, image, meta))
+            if processed - reported >= 100:
+                reported = processed
+                logger.info(f'{processed} itens, {processed / (time.perf_counter() - start):.2f} itens/s')
+        while pending:
+            pending = drain(FIRST_COMPLETED)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f'{processed} itens processados ({failed} com erro) em {elapsed:.1f}s '
+                f'({processed / elapsed if elapsed else 0:.2f} itens/s)')
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OCR de placas em lote sobre pastas, globs e vídeos, sem o servidor HTTP')
+    parser.add_argument('sources', nargs='+', help='pastas, arquivos, globs ("fotos/**/*.jpg") ou vídeos')
+    parser.add_argument('-o', '--output', default='batch_results.jsonl', help='saída JSONL (também usada para retomar)')
+    parser.add_argument('--parquet', help='ao final, grava também em Parquet (requer pyarrow)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--video-step', type=int, default=5, help='processa 1 a cada N quadros dos vídeos')
+    args = parser.parse_args()
+
+    run(args.sources, args.output, max(1, args.workers), max(1, args.video_step))
+    if args.parquet:
+        write_parquet(args.output, args.parquet)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
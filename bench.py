@@ -0,0 +1,168 @@
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic_plates import generate_corpus
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Variantes do pipeline: todas expõem PlateDataAnalysis com read_text_from_image e filter_plates
+VARIANTS = ['vTratamento.py', 'app.py', 'vTra1.py', 'testee.py'] + sorted(
+    os.path.relpath(path, ROOT) for path in glob.glob(os.path.join(ROOT, 'arquivos', '*.py')))
+
+
+def normalize(text):
+    return re.sub(r'[^A-Z0-9]', '', (text or '').upper())
+
+
+# Imagens reais (imagens/labels.json) e corpus sintético, como lista de (caminho, placa, origem)
+def build_corpus(images, synthetic, seed, folder):
+    corpus = []
+    labels = {}
+    for path in images:
+        folder_labels = os.path.join(os.path.dirname(path), 'labels.json')
+        if folder_labels not in labels:
+            labels[folder_labels] = json.load(open(folder_labels)) if os.path.exists(folder_labels) else {}
+        corpus.append((os.path.abspath(path), labels[folder_labels].get(os.path.basename(path)), 'real'))
+    if synthetic:
+        for name, plate in generate_corpus(folder, synthetic, seed).items():
+            corpus.append((os.path.join(folder, name), plate, 'synthetic'))
+    return corpus
+
+
+# Executado em um processo próprio por variante, para que o pico de memória seja só dela
+def run_variant(variant, corpus):
+    path = os.path.join(ROOT, variant)
+    sys.path[:0] = [os.path.dirname(path), ROOT]
+    spec = importlib.util.spec_from_file_location(f'bench_{os.path.splitext(variant)[0].replace("/", "_")}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    start = time.perf_counter()
+    analysis = module.PlateDataAnalysis()
+    load_seconds = time.perf_counter() - start
+    # Aquecimento fora da medição
+    analysis.filter_plates(analysis.read_text_from_image(corpus[0][0]))
+
+    items = []
+    for image_path, label, origin in corpus:
+        start = time.perf_counter()
+        error = None
+        try:
+            plates = analysis.filter_plates(analysis.read_text_from_image(image_path)) or []
+        except Exception as e:
+            plates, error = [], repr(e)
+        elapsed = time.perf_counter() - start
+        best = max(plates, key=lambda plate: plate['confidence'])['text'] if plates else None
+        items.append({'image': os.path.basename(image_path), 'origin': origin, 'label': label,
+                      'prediction': normalize(best) or None, 'seconds': elapsed, 'error': error})
+    # ru_maxrss em KB no Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {'variant': variant, 'load_seconds': load_seconds, 'peak_rss_mb': peak_rss_mb, 'items': items}
+
+
+def summarize(result):
+    items = result['items']
+    seconds = np.array([item['seconds'] for item in items])
+    summary = {
+        'variant': result['variant'],
+        'images': len(items),
+        'images_per_second': len(items) / seconds.sum() if seconds.sum() else 0.0,
+        'p50_ms': float(np.percentile(seconds, 50) * 1000),
+        'p95_ms': float(np.percentile(seconds, 95) * 1000),
+        'p99_ms': float(np.percentile(seconds, 99) * 1000),
+        'peak_rss_mb': result['peak_rss_mb'],
+        'load_seconds': result['load_seconds'],
+        'errors': sum(1 for item in items if item['error']),
+    }
+    for origin in ('real', 'synthetic', None):
+        labelled = [item for item in items if item['label'] and (origin is None or item['origin'] == origin)]
+        key = f'accuracy_{origin}' if origin else 'accuracy'
+        summary[key] = (sum(1 for item in labelled if item['prediction'] == normalize(item['label']))
+                        / len(labelled)) if labelled else None
+    return summary
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else '-'
+
+
+def print_table(summaries, baseline=None):
+    baseline = {summary['variant']: summary for summary in (baseline or [])}
+    print(f'{"variante":<20} {"img/s":>7} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"RSS MB":>7} '
+          f'{"acerto":>7} {"real":>6} {"sint.":>6}')
+    for summary in summaries:
+        print(f'{summary["variant"]:<20} {summary["images_per_second"]:>7.2f} {summary["p50_ms"]:>8.0f} '
+              f'{summary["p95_ms"]:>8.0f} {summary["p99_ms"]:>8.0f} {summary["peak_rss_mb"]:>7.0f} '
+              f'{_fmt(summary["accuracy"], ">7.1%")} {_fmt(summary["accuracy_real"], ">6.0%")} '
+              f'{_fmt(summary["accuracy_synthetic"], ">6.0%")}')
+        base = baseline.get(summary['variant'])
+        if base:
+            accuracy = (f'{(summary["accuracy"] - base["accuracy"]) * 100:+.1f} p.p.'
+                        if summary['accuracy'] is not None and base['accuracy'] is not None else '-')
+            print(f'{"  vs. base":<20} {summary["images_per_second"] / base["images_per_second"]:>6.2f}x '
+                  f'{summary["p50_ms"] - base["p50_ms"]:>+8.0f} {summary["p95_ms"] - base["p95_ms"]:>+8.0f} '
+                  f'{summary["p99_ms"] - base["p99_ms"]:>+8.0f} {summary["peak_rss_mb"] - base["peak_rss_mb"]:>+7.0f} '
+                  f'{accuracy:>7}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede vazão, latência, memória e acerto das variantes do pipeline')
+    parser.add_argument('--variants', nargs='*', default=VARIANTS, help='arquivos das variantes (padrão: todas)')
+    parser.add_argument('--images', nargs='*', default=sorted(glob.glob(os.path.join(ROOT, 'imagens', '*.jpg'))))
+    parser.add_argument('--synthetic', type=int, default=30, help='número de placas sintéticas (0 desativa)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='grava o resultado em JSON')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparação')
+    parser.add_argument('--run-variant', help=argparse.SUPPRESS)
+    parser.add_argument('--corpus', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_variant:
+        with open(args.corpus) as f:
+            corpus = json.load(f)
+        print(json.dumps(run_variant(args.run_variant, corpus)))
+        return
+
+    with tempfile.TemporaryDirectory(prefix='bench-') as folder:
+        corpus = build_corpus(args.images, args.synthetic, args.seed, os.path.join(folder, 'synthetic'))
+        corpus_path = os.path.join(folder, 'corpus.json')
+        with open(corpus_path, 'w') as f:
+            json.dump(corpus, f)
+
+        summaries = []
+        results = []
+        for variant in args.variants:
+            print(f'Executando {variant} em {len(corpus)} imagens...', file=sys.stderr)
+            process = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-variant', variant,
+                                      '--corpus', corpus_path], cwd=ROOT, capture_output=True, text=True)
+            if process.returncode != 0:
+                print(f'{variant}: falhou\n{process.stderr[-2000:]}', file=sys.stderr)
+                continue
+            result = json.loads(process.stdout.strip().splitlines()[-1])
+            results.append(result)
+            summaries.append(summarize(result))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['summaries']
+    print_table(summaries, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'seed': args.seed,
+                       'synthetic': args.synthetic, 'summaries': summaries, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
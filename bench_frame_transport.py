@@ -0,0 +1,100 @@
+import argparse
+import glob
+import multiprocessing as mp
+import pickle
+import time
+
+import cv2
+import numpy as np
+
+from frame_ring import FrameRing
+
+
+# Processo de teste: recebe o quadro e devolve um resumo (lê todos os pixels, como o OCR faria)
+def _echo_pickle(tasks, results):
+    while True:
+        image = tasks.get()
+        if image is None:
+            break
+        results.put(int(image.sum()))
+
+
+def _echo_ring(ring_spec, tasks, results):
+    ring = FrameRing(*ring_spec)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        results.put(int(ring.view(*task).sum()))
+
+
+def _percentile(timings, q):
+    return float(np.percentile(timings, q))
+
+
+# Envia os quadros um a um e mede o tempo de ida e volta (ms)
+def run_pickle(ctx, frames, repeat):
+    tasks, results = ctx.Queue(), ctx.Queue()
+    process = ctx.Process(target=_echo_pickle, args=(tasks, results), daemon=True)
+    process.start()
+    timings = []
+    for _ in range(repeat):
+        for image in frames:
+            start = time.perf_counter()
+            tasks.put(image)
+            results.get()
+            timings.append((time.perf_counter() - start) * 1000)
+    tasks.put(None)
+    process.join()
+    sent = sum(len(pickle.dumps(image, protocol=pickle.HIGHEST_PROTOCOL)) for image in frames) / len(frames)
+    return timings, sent
+
+
+def run_ring(ctx, frames, repeat):
+    ring = FrameRing(2, max(image.nbytes for image in frames))
+    tasks, results = ctx.Queue(), ctx.Queue()
+    process = ctx.Process(target=_echo_ring, args=((ring.slots, ring.slot_bytes, ring.name), tasks, results),
+                          daemon=True)
+    process.start()
+    timings = []
+    refs = []
+    for _ in range(repeat):
+        for image in frames:
+            start = time.perf_counter()
+            slot = ring.acquire()
+            ref = ring.write(slot, image)
+            tasks.put(ref)
+            results.get()
+            ring.release(slot)
+            timings.append((time.perf_counter() - start) * 1000)
+            refs.append(ref)
+    tasks.put(None)
+    process.join()
+    ring.close()
+    sent = sum(len(pickle.dumps(ref, protocol=pickle.HIGHEST_PROTOCOL)) for ref in refs) / len(refs)
+    return timings, sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara o envio de quadros aos processos de OCR por pickle e pelo anel de memória compartilhada')
+    parser.add_argument('images', nargs='*', default=sorted(glob.glob('imagens/*.jpg')))
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    frames = [image for image in (cv2.imread(path) for path in args.images) if image is not None]
+    if not frames:
+        parser.error('nenhuma imagem carregada')
+    frame_bytes = sum(image.nbytes for image in frames) / len(frames)
+    ctx = mp.get_context('spawn')
+
+    print(f'{len(frames)} quadros, {frame_bytes / 1e6:.1f} MB em média, {args.repeat} repetições')
+    print(f'{"transporte":<12} {"p50 (ms)":>9} {"p95 (ms)":>9} {"bytes pelo pipe":>16} {"cópias do quadro":>17}')
+    # pickle: serialização, escrita no pipe, leitura e desserialização; anel: só a escrita na posição
+    for name, runner, copies in (('pickle', run_pickle, 4), ('anel', run_ring, 1)):
+        timings, sent = runner(ctx, frames, args.repeat)
+        print(f'{name:<12} {_percentile(timings, 50):>9.2f} {_percentile(timings, 95):>9.2f} '
+              f'{sent:>16,.0f} {copies:>17}')
+
+
+if __name__ == '__main__':
+    main()
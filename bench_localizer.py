@@ -0,0 +1,117 @@
+import argparse
+import glob
+import json
+import os
+import random
+import time
+
+import cv2
+import numpy as np
+
+from plate_localizer import LOCALIZER_SCALE, find_plate_coarse_to_fine, find_plate_quadrilateral, locate_plate
+from synthetic_plates import (SYNTHETIC_ANGLES, SYNTHETIC_BLURS, SYNTHETIC_SCALES, compose_frame, random_plate,
+                              render_plate)
+
+# Acerto: o recorte cobre a largura da placa (os caracteres vão de uma borda à outra), a faixa dos
+# caracteres na altura (a faixa azul pode ficar de fora) e não é dominado pelo fundo (área em placas)
+HIT_MIN_WIDTH_COVERAGE = 0.9
+HIT_MIN_HEIGHT_COVERAGE = 0.6
+HIT_MAX_AREA_RATIO = 4.0
+
+
+# Mede o tempo médio (ms) de uma função de localização sobre a imagem
+def time_localizer(func, gray, repeat):
+    func(gray)  # aquecimento
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        location = func(gray)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings)), location
+
+
+# O recorte da localização contém os caracteres da placa (x1, y1, x2, y2) sem ser dominado pelo fundo
+def is_hit(location, plate_box):
+    if location is None or plate_box is None:
+        return False
+    x, y, w, h = cv2.boundingRect(location)
+    px1, py1, px2, py2 = plate_box
+    inter_w = max(0, min(x + w, px2) - max(x, px1))
+    inter_h = max(0, min(y + h, py2) - max(y, py1))
+    return (inter_w >= HIT_MIN_WIDTH_COVERAGE * (px2 - px1) and inter_h >= HIT_MIN_HEIGHT_COVERAGE * (py2 - py1)
+            and w * h <= HIT_MAX_AREA_RATIO * (px2 - px1) * (py2 - py1))
+
+
+# Imagens reais (retângulo da placa em plate_boxes.json da pasta) e quadros sintéticos com a posição conhecida
+def load_corpus(images, synthetic, seed):
+    corpus = []
+    boxes = {}
+    for path in images:
+        folder_boxes = os.path.join(os.path.dirname(path), 'plate_boxes.json')
+        if folder_boxes not in boxes:
+            boxes[folder_boxes] = json.load(open(folder_boxes)) if os.path.exists(folder_boxes) else {}
+        img = cv2.imread(path)
+        corpus.append((path, img, boxes[folder_boxes].get(os.path.basename(path))))
+    rng = random.Random(seed)
+    for i in range(synthetic):
+        plate_format = 'mercosul' if i % 2 == 0 else 'legacy'
+        scale = SYNTHETIC_SCALES[i % len(SYNTHETIC_SCALES)]
+        blur = SYNTHETIC_BLURS[(i // len(SYNTHETIC_SCALES)) % len(SYNTHETIC_BLURS)]
+        angle = SYNTHETIC_ANGLES[i % len(SYNTHETIC_ANGLES)]
+        frame, box = compose_frame(render_plate(random_plate(rng, plate_format), plate_format), rng, scale, angle,
+                                   blur, with_box=True)
+        corpus.append((f'sintética s{scale} b{blur} a{angle}', frame, box))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara a localização em resolução total com a busca na pirâmide '
+                                                 'reduzida: latência, nível e acerto')
+    parser.add_argument('images', nargs='*', default=sorted(glob.glob('imagens/*.jpg')))
+    parser.add_argument('--scale', type=float, default=LOCALIZER_SCALE)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--synthetic', type=int, default=30, help='quadros sintéticos 640x480 com a placa conhecida')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{"imagem":<32} {"resolução":>11} {"total (ms)":>11} {"pirâmide (ms)":>14} {"ganho":>7}  '
+          f'{"total":<6} {"pirâmide":<20} locate_plate')
+    hits = {'total': 0, 'pirâmide': 0, 'locate_plate': 0}
+    tiers = {}
+    measured = 0
+    for name, img, plate_box in load_corpus(args.images, args.synthetic, args.seed):
+        if img is None:
+            print(f'{name:<32} erro ao carregar')
+            continue
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+        full_ms, full_loc = time_localizer(find_plate_quadrilateral, gray, args.repeat)
+        coarse_ms, (coarse_loc, coarse_tier) = time_localizer(
+            lambda g: find_plate_coarse_to_fine(g, args.scale), gray, args.repeat)
+        location, tier = locate_plate(gray, args.scale)
+
+        results = {'total': is_hit(full_loc, plate_box), 'pirâmide': is_hit(coarse_loc, plate_box),
+                   'locate_plate': is_hit(location, plate_box)}
+        if plate_box is not None:
+            measured += 1
+            for key, hit in results.items():
+                hits[key] += hit
+            tiers.setdefault(tier, [0, 0])
+            tiers[tier][0] += 1
+            tiers[tier][1] += results['locate_plate']
+
+        mark = {True: 'ok', False: 'erro'} if plate_box is not None else {True: '-', False: '-'}
+        size = f'{gray.shape[1]}x{gray.shape[0]}'
+        coarse = f'{coarse_tier or "-"}/{mark[results["pirâmide"]]}'
+        print(f'{name:<32} {size:>11} {full_ms:>11.1f} {coarse_ms:>14.1f} {full_ms / coarse_ms:>6.1f}x  '
+              f'{mark[results["total"]]:<6} {coarse:<20} {tier}/{mark[results["locate_plate"]]}')
+
+    if measured:
+        print(f'\nacerto em {measured} imagens com a placa conhecida: ' +
+              ', '.join(f'{key} {count / measured:.0%}' for key, count in hits.items()))
+        print('locate_plate por nível: ' +
+              ', '.join(f'{tier} {total} ({hit} acertos)' for tier, (total, hit) in sorted(tiers.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from loguru import logger
+
+from frame_dedup import hamming_distance
+
+# Quadros de uma mesma câmera que chegam dentro da janela pertencem ao mesmo veículo
+SESSION_WINDOW_S = float(os.environ.get('SESSION_WINDOW_S', 5))
+# Confiança combinada a partir da qual a placa é decidida e os quadros seguintes não passam pelo OCR
+SESSION_CONFIDENCE = float(os.environ.get('SESSION_CONFIDENCE', 0.9))
+# Limite de quadros processados por veículo; atingido, decide com a melhor leitura disponível
+SESSION_MAX_FRAMES = int(os.environ.get('SESSION_MAX_FRAMES', 8))
+# Duração máxima de uma sessão desde o primeiro quadro, mesmo com quadros chegando continuamente
+SESSION_MAX_AGE_S = float(os.environ.get('SESSION_MAX_AGE_S', 30))
+# Tempo, após a decisão, em que os quadros seguintes recebem o resultado guardado
+SESSION_DECIDED_TTL_S = float(os.environ.get('SESSION_DECIDED_TTL_S', 10))
+# Distância de Hamming (em bits, de 64) entre o dHash do quadro e o do quadro anterior da sessão a partir
+# da qual a cena é considerada outra e a sessão é encerrada. Bem mais frouxa que DEDUP_MAX_DISTANCE:
+# o veículo se deslocando entre quadros não muda a cena, a troca de veículo sim
+SESSION_SCENE_CHANGE_DISTANCE = int(os.environ.get('SESSION_SCENE_CHANGE_DISTANCE', 20))
+
+
+# Sessão de uma câmera: votos por caractere das leituras de vários quadros
+class CameraSession:
+    def __init__(self, camera_id):
+        self.id = uuid.uuid4().hex[:12]
+        self.camera_id = camera_id
+        self.started = self.last_seen = time.monotonic()
+        self.frames = 0
+        self.skipped = 0
+        self.decided = False
+        self.decided_at = None
+        self.plate = None
+        self.ended = False
+        self.response = None
+        self.scene_hash = None
+        self._votes = defaultdict(lambda: defaultdict(list))
+        self._formats = Counter()
+        self._lock = threading.Lock()
+
+    def update(self, plates):
+        """Adiciona as leituras do quadro e retorna a placa combinada (ou None)."""
+        with self._lock:
+            self.add(plates)
+            fused = self.fused()
+            self.last_seen = time.monotonic()
+            if not self.decided and self.should_decide(fused):
+                if fused is None:
+                    # Limite de quadros sem nenhuma leitura completa: encerra sem decidir, para que o
+                    # "nenhuma placa" não seja repetido aos veículos seguintes
+                    self.ended = True
+                    logger.info(f'Sessão {self.id} encerrada sem placa após {self.frames} quadros')
+                else:
+                    self.decided = True
+                    self.decided_at = self.last_seen
+                    self.plate = fused
+                    logger.info(f'Sessão {self.id} decidida após {self.frames} quadros: {fused}')
+            return fused
+
+    def add(self, plates):
+        """Registra a melhor leitura do quadro (lista de filter_plates ou None)."""
+        self.frames += 1
+        if not plates:
+            return
+        best = max(plates, key=lambda plate: plate['confidence'])
+        if len(best['text']) != 7:
+            return
+        for position, char in enumerate(best['text']):
+            self._votes[position][char].append(best['confidence'])
+        self._formats[best.get('format')] += 1
+
+    def fused(self):
+        """
+        Placa combinada por votação em cada posição. A confiança de uma posição
+        é 1 - prod(1 - c) das leituras que concordam, ponderada pela fração do
+        peso que concorda; a confiança da placa é a menor entre as posições.
+        """
+        if len(self._votes) != 7:
+            return None
+        chars = []
+        confidence = 1.0
+        for position in range(7):
+            votes = self._votes[position]
+            char = max(votes, key=lambda c: sum(votes[c]))
+            agree = 1.0
+            for c in votes[char]:
+                agree *= 1.0 - c
+            total = sum(sum(v) for v in votes.values())
+            confidence = min(confidence, (1.0 - agree) * sum(votes[char]) / total)
+            chars.append(char)
+        return {
+            'text': ''.join(chars),
+            'confidence': confidence,
+            'format': self._formats.most_common(1)[0][0],
+        }
+
+    def should_decide(self, fused):
+        if fused is not None and fused['confidence'] >= SESSION_CONFIDENCE:
+            return True
+        return self.frames >= SESSION_MAX_FRAMES
+
+    def scene_changed(self, frame_hash):
+        return (frame_hash is not None and self.scene_hash is not None
+                and hamming_distance(frame_hash, self.scene_hash) > SESSION_SCENE_CHANGE_DISTANCE)
+
+    def expired(self, now, window):
+        if self.ended or now - self.last_seen > window or now - self.started > SESSION_MAX_AGE_S:
+            return True
+        return self.decided and now - self.decided_at > SESSION_DECIDED_TTL_S
+
+    def info(self, skipped=False):
+        return {
+            'id': self.id,
+            'camera_id': self.camera_id,
+            'frames': self.frames,
+            'skipped_frames': self.skipped,
+            'decided': self.decided,
+            'skipped': skipped,
+        }
+
+
+# Agrupa os quadros de cada câmera em sessões. Só os quadros que passam pelo OCR renovam a janela;
+# a sessão também expira pela idade, pelo tempo desde a decisão, por uma mudança grande de cena ou ao
+# ser encerrada (cena vazia), para que um veículo nunca receba o resultado do anterior.
+class SessionTracker:
+    def __init__(self, window=SESSION_WINDOW_S):
+        self.window = window
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, camera_id, frame_hash=None):
+        """
+        Sessão atual da câmera para o quadro. `frame_hash` (dHash) é comparado com o do quadro
+        anterior da sessão, decidida ou não; a referência acompanha o veículo quadro a quadro.
+        """
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(camera_id)
+            if session is not None and session.scene_changed(frame_hash):
+                logger.info(f'Sessão {session.id} encerrada: a cena da câmera {camera_id} mudou')
+                session.ended = True
+            if session is None or session.expired(now, self.window):
+                session = CameraSession(camera_id)
+                self._sessions[camera_id] = session
+                logger.info(f'Nova sessão {session.id} para a câmera {camera_id}')
+            if frame_hash is not None:
+                session.scene_hash = frame_hash
+            return session
+
+    def end(self, camera_id):
+        """Encerra a sessão atual da câmera; o próximo quadro inicia uma nova."""
+        with self._lock:
+            session = self._sessions.get(camera_id)
+            if session is not None:
+                session.ended = True
+
+
+session_tracker = SessionTracker()
@@ -6,6 +6,7 @@
 const char* ssid = "IFMA_VISITANTE";
 const char* password = "visitante@ifma";
 const char* serverUrl = "http://10.24.8.239:5001/upload";
+const char* cameraId = "portao-1";  // Identifica a câmera para agrupar os quadros de um mesmo veículo
 
 #define CAMERA_MODEL_AI_THINKER
 #define PWDN_GPIO_NUM     32
@@ -101,6 +102,7 @@ void setup() {
       client.print("POST /upload HTTP/1.1\r\n");
       client.print("Host: 10.24.8.239\r\n");
       client.print("Content-Type: " + contentType + "\r\n");
+      client.print("X-Camera-Id: " + String(cameraId) + "\r\n");
       client.print("Content-Length: " + String(formDataStart.length() + fb->len + formDataEnd.length()) + "\r\n");
       client.print("Connection: close\r\n\r\n");
 
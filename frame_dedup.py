@@ -0,0 +1,65 @@
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Distância de Hamming (em bits, de 64) abaixo da qual o quadro é considerado igual ao anterior
+DEDUP_MAX_DISTANCE = int(os.environ.get('DEDUP_MAX_DISTANCE', 4))
+# Idade máxima do resultado reaproveitado, para que a verificação seja refeita periodicamente
+DEDUP_MAX_AGE_S = float(os.environ.get('DEDUP_MAX_AGE_S', 30))
+DEDUP_ENABLED = os.environ.get('DEDUP_ENABLED', '1') == '1'
+
+
+# Hash perceptual por diferença (dHash) de 64 bits
+def dhash(image, size=8):
+    # Subamostragem por passo antes do resize para não percorrer o quadro inteiro
+    step = max(1, min(image.shape[:2]) // (size * 8))
+    thumb = cv2.resize(image[::step, ::step], (size + 1, size), interpolation=cv2.INTER_AREA)
+    if thumb.ndim == 3:
+        thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+# Último quadro processado de cada câmera e o resultado correspondente
+class FrameDeduplicator:
+    def __init__(self, max_distance=DEDUP_MAX_DISTANCE, max_age=DEDUP_MAX_AGE_S):
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self._last = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, camera_id, frame_hash):
+        """Retorna o resultado do último quadro se a cena não mudou, senão None."""
+        with self._lock:
+            entry = self._last.get(camera_id)
+            if (entry is not None and time.monotonic() - entry[2] <= self.max_age
+                    and hamming_distance(entry[0], frame_hash) <= self.max_distance):
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def store(self, camera_id, frame_hash, result):
+        with self._lock:
+            self._last[camera_id] = (frame_hash, result, time.monotonic())
+
+    def metrics(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'cameras': len(self._last),
+        }
+
+
+frame_deduplicator = FrameDeduplicator()
@@ -0,0 +1,61 @@
+import os
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Número de quadros em trânsito ao mesmo tempo (0 = o dobro do número de processos de OCR)
+FRAME_RING_SLOTS = int(os.environ.get('FRAME_RING_SLOTS', 0))
+# Tamanho de cada posição; o padrão comporta quadros BGR de até 1920x1200 (UXGA e Full HD)
+FRAME_RING_SLOT_BYTES = int(os.environ.get('FRAME_RING_SLOT_BYTES', 1920 * 1200 * 3))
+
+
+# Anel de quadros em um único bloco de memória compartilhada, dividido em posições de tamanho fixo
+class FrameRing:
+    def __init__(self, slots, slot_bytes=FRAME_RING_SLOT_BYTES, name=None):
+        """
+        Sem `name`, cria o bloco (processo principal) e controla as posições livres;
+        com `name`, apenas se conecta a um anel existente (processos de OCR).
+        """
+        self.slots = max(1, int(slots))
+        self.slot_bytes = int(slot_bytes)
+        self.owner = name is None
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+            self._free = queue.Queue()
+            for slot in range(self.slots):
+                self._free.put(slot)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._free = None
+        self.name = self._shm.name
+
+    def fits(self, image):
+        return image.nbytes <= self.slot_bytes
+
+    def acquire(self, timeout=None):
+        """Reserva uma posição livre; bloqueia enquanto o anel estiver cheio (queue.Empty no timeout)."""
+        return self._free.get(timeout=timeout)
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def view(self, slot, shape, dtype):
+        """Array NumPy sobre a posição, sem cópia."""
+        dtype = np.dtype(dtype)
+        if int(np.prod(shape)) * dtype.itemsize > self.slot_bytes:
+            raise ValueError(f'Quadro {shape} não cabe na posição de {self.slot_bytes} bytes do anel')
+        return np.ndarray(shape, dtype, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+
+    def write(self, slot, image):
+        """Copia o quadro para a posição e retorna a referência (posição, forma, tipo) enviada aos processos."""
+        self.view(slot, image.shape, image.dtype)[...] = image
+        return slot, image.shape, image.dtype.str
+
+    def available(self):
+        return self._free.qsize() if self._free is not None else None
+
+    def close(self):
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
@@ -0,0 +1,172 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from loguru import logger
+
+# Tamanho máximo da fila de trabalhos; cheia, novos envios recebem 429
+JOBS_QUEUE_SIZE = int(os.environ.get('JOBS_QUEUE_SIZE', 16))
+JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 2))
+# Tempo que um trabalho concluído continua disponível para consulta
+JOBS_RETENTION_S = float(os.environ.get('JOBS_RETENTION_S', 300))
+# Espera máxima de GET /jobs/<id>?wait=N (long-poll)
+JOBS_MAX_WAIT_S = float(os.environ.get('JOBS_MAX_WAIT_S', 30))
+JOBS_CALLBACK_TIMEOUT = float(os.environ.get('JOBS_CALLBACK_TIMEOUT', 5))
+# Hosts (ou host:porta) aceitos como callback_url, separados por vírgula; vazio desativa os callbacks,
+# para que o servidor não faça POST a qualquer endereço informado pelo cliente
+JOBS_CALLBACK_HOSTS = {host.strip().lower() for host in os.environ.get('JOBS_CALLBACK_HOSTS', '').split(',')
+                       if host.strip()}
+# Threads que enviam os callbacks, separadas das que executam o OCR
+JOBS_CALLBACK_WORKERS = int(os.environ.get('JOBS_CALLBACK_WORKERS', 2))
+
+
+def _ms(start, end):
+    return round((end - start) * 1000, 1) if start is not None and end is not None else None
+
+
+def callback_allowed(url, hosts=None):
+    hosts = JOBS_CALLBACK_HOSTS if hosts is None else hosts
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return False
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return False
+    host = parts.hostname.lower()
+    return host in hosts or (port is not None and f'{host}:{port}' in hosts)
+
+
+# Trabalho de OCR enfileirado
+class Job:
+    def __init__(self, payload, callback_url=None):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.callback_url = callback_url
+        self.status = 'queued'
+        self.result = None
+        self.status_code = None
+        self.created = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.callback_ms = None
+        self.callback_status = None
+        self.done = threading.Event()
+
+    def timings(self):
+        return {
+            'queued_ms': _ms(self.created, self.started),
+            'processing_ms': _ms(self.started, self.finished),
+            'total_ms': _ms(self.created, self.finished),
+            'callback_ms': self.callback_ms,
+        }
+
+    def info(self):
+        info = {'id': self.id, 'status': self.status, 'timings': self.timings()}
+        if self.done.is_set():
+            info['status_code'] = self.status_code
+            info['result'] = self.result
+        if self.callback_url:
+            info['callback_status'] = self.callback_status
+        return info
+
+
+# Fila limitada de trabalhos processados por threads de fundo
+class JobQueue:
+    def __init__(self, handler, maxsize=JOBS_QUEUE_SIZE, workers=JOBS_WORKERS, retention=JOBS_RETENTION_S):
+        """
+        `handler(payload)` executa o trabalho e retorna (resultado, status HTTP).
+        """
+        self.handler = handler
+        self.retention = retention
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._callbacks = ThreadPoolExecutor(max_workers=max(1, JOBS_CALLBACK_WORKERS),
+                                             thread_name_prefix='ocr-job-callback')
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        for i in range(max(1, workers)):
+            threading.Thread(target=self._run, name=f'ocr-job-worker-{i}', daemon=True).start()
+
+    def submit(self, payload, callback_url=None):
+        """Enfileira o trabalho; retorna None se a fila estiver cheia."""
+        self._prune()
+        job = Job(payload, callback_url)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            self.rejected += 1
+            return None
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job, timeout):
+        job.done.wait(min(max(0.0, timeout), JOBS_MAX_WAIT_S))
+        return job
+
+    # Remove os trabalhos concluídos há mais tempo que a retenção
+    def _prune(self):
+        limit = time.monotonic() - self.retention
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.finished is not None and job.finished < limit]:
+                del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            job.status = 'running'
+            job.started = time.monotonic()
+            try:
+                job.result, job.status_code = self.handler(job.payload)
+                job.status = 'done'
+                self.completed += 1
+            except Exception as e:
+                logger.error(f'Erro ao processar o trabalho {job.id}: {e}')
+                job.result, job.status_code = {'error': str(e)}, 500
+                job.status = 'error'
+                self.failed += 1
+            job.finished = time.monotonic()
+            job.payload = None
+            job.done.set()
+            if job.callback_url:
+                # O envio não ocupa a thread de OCR enquanto aguarda o destino
+                self._callbacks.submit(self._callback, job)
+
+    # Envia o resultado para a URL de retorno informada no envio (já validada por callback_allowed)
+    def _callback(self, job):
+        start = time.monotonic()
+        try:
+            # Redirecionamentos não são seguidos: levariam a um host fora da lista
+            response = self._session.post(job.callback_url, json=job.info(), timeout=JOBS_CALLBACK_TIMEOUT,
+                                          allow_redirects=False)
+            job.callback_status = response.status_code
+        except requests.RequestException as e:
+            logger.error(f'Erro ao chamar o callback do trabalho {job.id}: {e}')
+            job.callback_status = 'failed'
+        job.callback_ms = _ms(start, time.monotonic())
+
+    def metrics(self):
+        return {
+            'pending': self._queue.qsize(),
+            'capacity': self._queue.maxsize,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'tracked': len(self._jobs),
+        }
@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+from easyocr.utils import reformat_input
+from loguru import logger
+
+from ocr_profiles import get_profile
+from pipeline_metrics import stage
+
+DECODERS = ['beamsearch', 'wordbeamsearch', 'greedy']
+
+
+# Executa a detecção de texto (CRAFT) uma única vez e guarda as caixas
+def detect_text_regions(reader, image, profile=None):
+    """
+    Retorna a imagem em escala de cinza usada pelo reconhecedor e as caixas
+    detectadas (horizontais e livres), para que possam ser reaproveitadas por
+    vários decodificadores sem repetir a etapa de detecção.
+    """
+    img, img_cv_grey = reformat_input(image)
+    with stage('detect'):
+        horizontal_list, free_list = reader.detect(img, **get_profile(profile)['detect'])
+    return img_cv_grey, horizontal_list[0], free_list[0]
+
+
+# Executa apenas a etapa de reconhecimento para cada decodificador
+def recognize_with_decoders(reader, image, decoders=DECODERS, profile=None):
+    img_cv_grey, horizontal_list, free_list = detect_text_regions(reader, image, profile)
+    if not horizontal_list and not free_list:
+        return {decoder: [] for decoder in decoders}
+
+    results = {}
+    for decoder in decoders:
+        logger.info(f"Reconhecendo com o decodificador {decoder} (detecção reaproveitada)...")
+        with stage(f'recognize_{decoder}'):
+            results[decoder] = reader.recognize(img_cv_grey, horizontal_list, free_list, decoder=decoder,
+                                                **get_profile(profile)['recognize'])
+    return results
+
+
+def _box_key(box):
+    return tuple(tuple(int(round(float(v))) for v in point) for point in box)
+
+
+# Votação por caixa entre os resultados dos decodificadores
+def fuse_decoder_results(results_by_decoder):
+    """
+    Para cada caixa detectada escolhe o texto com maior soma de confiança entre
+    os decodificadores. A confiança final é essa soma dividida pelo número de
+    decodificadores, de modo que divergências reduzem a confiança.
+    Retorna uma lista no mesmo formato de `readtext`: (caixa, texto, confiança).
+    """
+    num_decoders = max(1, len(results_by_decoder))
+    boxes = {}
+    votes = defaultdict(lambda: defaultdict(float))
+
+    for decoder_results in results_by_decoder.values():
+        for box, text, confidence in decoder_results:
+            key = _box_key(box)
+            boxes.setdefault(key, box)
+            votes[key][text] += float(confidence)
+
+    fused = []
+    for key, box in boxes.items():
+        text, score = max(votes[key].items(), key=lambda item: item[1])
+        fused.append((box, text, score / num_decoders))
+    return fused
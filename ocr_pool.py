@@ -0,0 +1,110 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import easyocr
+from loguru import logger
+
+from ocr_profiles import get_profile
+from ocr_workers import OCRBusy
+from pipeline_metrics import observe_stage
+
+# Configuração do pool (pode ser sobrescrita por variáveis de ambiente)
+OCR_POOL_SIZE = int(os.environ.get('OCR_POOL_SIZE', 2))
+OCR_POOL_TIMEOUT = float(os.environ.get('OCR_POOL_TIMEOUT', 30))
+
+
+# Pool de leitores EasyOCR pré-carregados, compartilhado pelo processo
+class ReaderPool:
+    def __init__(self, size=OCR_POOL_SIZE, languages=None, warmup=True):
+        """
+        Cria `size` leitores EasyOCR uma única vez. Cada requisição faz o
+        checkout de um leitor, usa e devolve ao pool, evitando recarregar os
+        pesos do detector e do reconhecedor a cada upload.
+        """
+        self.size = max(1, int(size))
+        self.languages = languages or get_profile()['languages']
+        self._readers = queue.Queue(maxsize=self.size)
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._in_use = 0
+
+        for i in range(self.size):
+            start = time.perf_counter()
+            reader = easyocr.Reader(self.languages)
+            if warmup:
+                self._warmup(reader)
+            logger.info(f'Leitor OCR {i + 1}/{self.size} carregado em {time.perf_counter() - start:.2f}s')
+            self._readers.put(reader)
+
+    @staticmethod
+    def _warmup(reader):
+        # Inferência de aquecimento para inicializar o modelo antes do primeiro upload
+        image = np.full((64, 256, 3), 255, np.uint8)
+        reader.readtext(image)
+
+    def checkin(self, reader):
+        with self._lock:
+            self._in_use -= 1
+        self._readers.put(reader)
+
+    def checkout(self, timeout=OCR_POOL_TIMEOUT):
+        start = time.perf_counter()
+        try:
+            reader = self._readers.get(timeout=timeout)
+        except queue.Empty:
+            raise OCRBusy(f'Nenhum leitor OCR livre em {timeout:.0f}s') from None
+        waited = time.perf_counter() - start
+        observe_stage('reader_pool_wait', waited)
+        with self._lock:
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._in_use += 1
+        if waited > 0.1:
+            logger.warning(f'Aguardou {waited:.3f}s por um leitor OCR livre')
+        return reader
+
+    @contextmanager
+    def reader(self, timeout=OCR_POOL_TIMEOUT):
+        reader = self.checkout(timeout)
+        try:
+            yield reader
+        finally:
+            self.checkin(reader)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'available': self._readers.qsize(),
+                'checkouts': self._checkouts,
+                'wait_total_seconds': self._total_wait,
+                'wait_avg_seconds': self._total_wait / self._checkouts if self._checkouts else 0.0,
+                'wait_max_seconds': self._max_wait,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# Retorna o pool global, criando-o na primeira chamada. `size` e `languages` só valem na criação;
+# pedir o pool já criado com outra configuração é um erro, em vez de devolver leitores diferentes
+# dos pedidos
+def get_reader_pool(size=None, languages=None):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ReaderPool(size=OCR_POOL_SIZE if size is None else size, languages=languages)
+        elif ((size is not None and max(1, int(size)) != _pool.size)
+              or (languages is not None and list(languages) != list(_pool.languages))):
+            raise ValueError(f'Pool OCR já criado com size={_pool.size}, languages={_pool.languages}; '
+                             f'pedido size={size}, languages={languages}')
+        return _pool
@@ -0,0 +1,35 @@
+import os
+import string
+
+# Alfabeto das placas: apenas letras maiúsculas e números
+PLATE_ALPHABET = string.ascii_uppercase + string.digits
+
+# Perfis de reconhecimento: idiomas do leitor (definem o modelo carregado) e
+# parâmetros das etapas de detecção e reconhecimento do EasyOCR
+OCR_PROFILES = {
+    # Perfil original: modelo latino completo (português + inglês)
+    'general': {
+        'languages': ['pt', 'en'],
+        'detect': {},
+        'recognize': {},
+    },
+    # Perfil de placas: um único modelo (inglês), alfabeto restrito e detecção
+    # em canvas menor, já que a entrada costuma ser o recorte da placa
+    'plate': {
+        'languages': ['en'],
+        'detect': {'min_size': 10, 'canvas_size': 1280, 'mag_ratio': 1.0},
+        'recognize': {'allowlist': PLATE_ALPHABET, 'paragraph': False},
+    },
+}
+
+OCR_PROFILE = os.environ.get('OCR_PROFILE', 'plate')
+
+
+def get_profile(name=None):
+    return OCR_PROFILES[name or OCR_PROFILE]
+
+
+# Parâmetros de `readtext` (detecção + reconhecimento) do perfil
+def readtext_kwargs(name=None):
+    profile = get_profile(name)
+    return {**profile['detect'], **profile['recognize']}
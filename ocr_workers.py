@@ -0,0 +1,301 @@
+import importlib
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+from loguru import logger
+
+from frame_ring import FRAME_RING_SLOT_BYTES, FRAME_RING_SLOTS, FrameRing
+
+# Número de processos de OCR (0 = OCR no próprio processo do servidor)
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 0))
+# Fixa cada processo em um conjunto exclusivo de núcleos
+OCR_WORKER_PIN = os.environ.get('OCR_WORKER_PIN', '1') == '1'
+# Tempo máximo de um quadro; um processo que passa disso é considerado travado, encerrado e reiniciado
+OCR_WORKER_TIMEOUT = float(os.environ.get('OCR_WORKER_TIMEOUT', 60))
+# Espera máxima entre tentativas de reiniciar um processo que termina antes de ficar pronto
+OCR_WORKER_MAX_BACKOFF_S = float(os.environ.get('OCR_WORKER_MAX_BACKOFF_S', 60))
+# Função executada nos processos, no formato 'modulo:funcao' (módulo sem efeitos colaterais na importação)
+OCR_WORKER_HANDLER = os.environ.get('OCR_WORKER_HANDLER', 'plate_analysis:ocr_frame')
+# Segundos sugeridos no cabeçalho Retry-After quando não há leitor nem processo de OCR livre
+OCR_BUSY_RETRY_AFTER_S = int(os.environ.get('OCR_BUSY_RETRY_AFTER_S', 1))
+
+_main_lock = threading.Lock()
+
+
+# Nenhum leitor (ocr_pool) ou processo de OCR livre dentro do timeout; as rotas respondem 503 com Retry-After.
+# Definida aqui, e não em ocr_pool, para que os processos de OCR não importem o EasyOCR antes de limitar as threads
+class OCRBusy(Exception):
+    pass
+
+
+# Núcleos de cada processo: os núcleos disponíveis divididos igualmente
+def _cpu_sets(workers):
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+    per_worker = max(1, len(cpus) // workers)
+    return [cpus[(i * per_worker) % len(cpus):(i * per_worker) % len(cpus) + per_worker] for i in range(workers)]
+
+
+# Copia para um bloco próprio de memória compartilhada um quadro que não cabe no anel
+def _share_frame(image):
+    shm = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+    np.ndarray(image.shape, image.dtype, buffer=shm.buf)[...] = image
+    return shm, ('shm', shm.name, image.shape, image.dtype.str)
+
+
+# O spawn executa de novo o script principal em cada processo filho (como __mp_main__), o que criaria
+# nele o app Flask, a fila de trabalhos e os streams. O processo de OCR só precisa do handler, importado
+# pelo caminho 'modulo:funcao', então o script principal é omitido enquanto o processo é iniciado.
+@contextmanager
+def _without_main_script():
+    main = sys.modules['__main__']
+    with _main_lock:
+        saved = {name: main.__dict__[name] for name in ('__file__', '__spec__') if name in main.__dict__}
+        main.__dict__.pop('__file__', None)
+        main.__spec__ = None
+        try:
+            yield
+        finally:
+            main.__dict__.pop('__spec__', None)
+            main.__dict__.update(saved)
+
+
+# Laço de um processo de OCR: carrega o leitor uma vez e atende os quadros enviados
+def _worker_main(index, generation, cpus, handler_path, ring_spec, tasks, results):
+    # Limita as threads do PyTorch/OpenMP aos núcleos do processo antes de importá-los
+    threads = str(len(cpus)) if cpus else '1'
+    os.environ['OMP_NUM_THREADS'] = threads
+    os.environ['MKL_NUM_THREADS'] = threads
+    os.environ['OCR_POOL_SIZE'] = '1'
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+    module_name, func_name = handler_path.split(':')
+    handler = getattr(importlib.import_module(module_name), func_name)
+    from ocr_pool import get_reader_pool
+    get_reader_pool()
+    ring = FrameRing(*ring_spec)
+    results.put((index, generation, None, 'ready', None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, (kind, location, shape, dtype) = task
+        # A memória pertence ao processo principal, que a libera ao receber o resultado;
+        # o handler recebe uma visão direta do quadro, sem cópia
+        shm = shared_memory.SharedMemory(name=location) if kind == 'shm' else None
+        try:
+            if shm is None:
+                image = ring.view(location, shape, dtype)
+            else:
+                image = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+            result = handler(image)
+            del image
+            results.put((index, generation, task_id, 'ok', result))
+        except Exception as e:
+            results.put((index, generation, task_id, 'error', repr(e)))
+        finally:
+            if shm is not None:
+                shm.close()
+
+
+# Pool de processos de OCR com despacho para processos livres e reinício supervisionado
+class OCRWorkerPool:
+    def __init__(self, workers=OCR_WORKERS, handler=OCR_WORKER_HANDLER, pin=OCR_WORKER_PIN,
+                 ring_slots=FRAME_RING_SLOTS, slot_bytes=FRAME_RING_SLOT_BYTES):
+        self.workers = max(1, int(workers))
+        self.handler = handler
+        # Posições pré-alocadas para os quadros em trânsito; anel cheio bloqueia novos envios
+        self.ring = FrameRing(ring_slots or 2 * self.workers, slot_bytes)
+        self.oversized = 0
+        self._ctx = mp.get_context('spawn')
+        self._cpus = _cpu_sets(self.workers) if pin else [None] * self.workers
+        self._results = self._ctx.Queue()
+        self._processes = [None] * self.workers
+        self._tasks = [None] * self.workers
+        # Geração de cada processo: entradas da fila de livres de um processo substituído são descartadas
+        self._generations = [0] * self.workers
+        # Reinício com espera crescente para processos que terminam antes de ficar prontos
+        # (ex.: erro ao importar o handler), em vez de tentar a cada segundo indefinidamente
+        self._ready = [False] * self.workers
+        self._backoff = [0.0] * self.workers
+        self._restart_at = [0.0] * self.workers
+        self._inflight = {}
+        self._idle = queue.Queue()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+
+        for index in range(self.workers):
+            self._start(index)
+        threading.Thread(target=self._collect, name='ocr-worker-results', daemon=True).start()
+        threading.Thread(target=self._supervise, name='ocr-worker-supervisor', daemon=True).start()
+
+    def _start(self, index):
+        self._generations[index] += 1
+        self._ready[index] = False
+        tasks = self._ctx.Queue()
+        process = self._ctx.Process(target=_worker_main, name=f'ocr-worker-{index}',
+                                    args=(index, self._generations[index], self._cpus[index], self.handler,
+                                          (self.ring.slots, self.ring.slot_bytes, self.ring.name),
+                                          tasks, self._results),
+                                    daemon=True)
+        with _without_main_script():
+            process.start()
+        self._tasks[index] = tasks
+        self._processes[index] = process
+        logger.info(f'Processo de OCR {index} iniciado (pid {process.pid}, núcleos {self._cpus[index]})')
+
+    def submit(self, image, timeout=OCR_WORKER_TIMEOUT):
+        """Envia o quadro ao próximo processo livre; retorna um Future com o resultado do handler."""
+        deadline = time.monotonic() + timeout
+        # A única cópia do quadro: para uma posição do anel (ou, se não couber, para um bloco próprio)
+        if self.ring.fits(image):
+            try:
+                slot = self.ring.acquire(timeout=timeout)
+            except queue.Empty:
+                raise OCRBusy(f'Anel de quadros cheio por {timeout:.0f}s') from None
+            ref = ('ring',) + self.ring.write(slot, image)
+            release = lambda: self.ring.release(slot)
+        else:
+            self.oversized += 1
+            shm, ref = _share_frame(np.ascontiguousarray(image))
+            release = lambda: (shm.close(), shm.unlink())
+        try:
+            while True:
+                index, generation = self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+                if generation == self._generations[index] and self._processes[index].is_alive():
+                    break
+        except queue.Empty:
+            release()
+            raise OCRBusy(f'Nenhum processo de OCR livre em {timeout:.0f}s') from None
+        task_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            self._inflight[index] = (task_id, future, release, time.monotonic() + timeout)
+        self._tasks[index].put((task_id, ref))
+        return future
+
+    def run(self, image, timeout=OCR_WORKER_TIMEOUT):
+        try:
+            return self.submit(image, timeout).result(timeout=timeout)
+        except FutureTimeout:
+            # O supervisor encerra o processo travado e libera a posição do anel
+            raise OCRBusy(f'OCR do quadro excedeu {timeout:.0f}s') from None
+
+    def _release(self, index, task_id=None):
+        with self._lock:
+            entry = self._inflight.get(index)
+            if entry is None or (task_id is not None and entry[0] != task_id):
+                return None
+            del self._inflight[index]
+        entry[2]()
+        return entry[1]
+
+    def _collect(self):
+        while True:
+            index, generation, task_id, status, payload = self._results.get()
+            # Resultado de um processo já substituído (encerrado por timeout, por exemplo)
+            if generation != self._generations[index]:
+                continue
+            if status == 'ready':
+                logger.info(f'Processo de OCR {index} pronto (pid {self._processes[index].pid})')
+                self._ready[index] = True
+                self._backoff[index] = 0.0
+                self._idle.put((index, generation))
+                continue
+            future = self._release(index, task_id)
+            self._idle.put((index, self._generations[index]))
+            if future is None:
+                continue
+            if status == 'ok':
+                self.completed += 1
+                future.set_result(payload)
+            else:
+                self.failed += 1
+                future.set_exception(RuntimeError(f'Erro no processo de OCR {index}: {payload}'))
+
+    # Encerra processos travados (quadro além do timeout), reinicia os que terminaram e falha o quadro
+    # que estavam processando, liberando a posição do anel
+    def _supervise(self):
+        while not self._closed:
+            time.sleep(1.0)
+            now = time.monotonic()
+            for index, process in enumerate(self._processes):
+                if self._closed:
+                    break
+                with self._lock:
+                    entry = self._inflight.get(index)
+                if process.is_alive() and entry is not None and now > entry[3]:
+                    logger.error(f'Processo de OCR {index} excedeu {OCR_WORKER_TIMEOUT:.0f}s em um quadro; encerrando')
+                    process.kill()
+                    process.join(timeout=5)
+                if process.is_alive():
+                    continue
+                if self._restart_at[index] == 0.0:
+                    self._on_exit(index, process, now)
+                if now >= self._restart_at[index]:
+                    self._restart_at[index] = 0.0
+                    self.restarts += 1
+                    self._start(index)
+
+    def _on_exit(self, index, process, now):
+        future = self._release(index)
+        if future is not None:
+            self.failed += 1
+            future.set_exception(RuntimeError(f'Processo de OCR {index} terminou durante o OCR'))
+        if self._ready[index]:
+            self._backoff[index] = 0.0
+        else:
+            self._backoff[index] = min(OCR_WORKER_MAX_BACKOFF_S, max(1.0, self._backoff[index] * 2))
+        self._restart_at[index] = now + self._backoff[index]
+        logger.error(f'Processo de OCR {index} terminou (código {process.exitcode}); '
+                     f'reiniciando em {self._backoff[index]:.0f}s')
+
+    def close(self):
+        self._closed = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+        self.ring.close()
+
+    def metrics(self):
+        return {
+            'workers': self.workers,
+            'alive': sum(1 for process in self._processes if process.is_alive()),
+            'idle': self._idle.qsize(),
+            'busy': len(self._inflight),
+            'completed': self.completed,
+            'failed': self.failed,
+            'restarts': self.restarts,
+            'cpus': self._cpus,
+            'ring_slots': self.ring.slots,
+            'ring_free': self.ring.available(),
+            'oversized_frames': self.oversized,
+        }
+
+
+_workers = None
+_workers_lock = threading.Lock()
+
+
+# Retorna o pool global de processos, criando-o na primeira chamada
+def get_ocr_workers():
+    global _workers
+    with _workers_lock:
+        if _workers is None:
+            _workers = OCRWorkerPool()
+        return _workers
@@ -0,0 +1,63 @@
+import os
+import random
+import uuid
+
+import cv2
+from loguru import logger
+
+# Em produção nenhuma imagem intermediária é gerada. A captura das etapas é
+# ativada por requisição (?debug=1) ou por amostragem (DEBUG_SAMPLE_RATE).
+DEBUG_SAMPLE_RATE = float(os.environ.get('DEBUG_SAMPLE_RATE', 0))
+DEBUG_FOLDER = os.environ.get('DEBUG_FOLDER', './outputs/debug')
+DEBUG_IN_MEMORY = os.environ.get('DEBUG_IN_MEMORY', '0') == '1'
+DEBUG_SHOW = os.environ.get('DEBUG_SHOW', '0') == '1'
+
+
+# Captura das imagens de cada etapa do pipeline para uma requisição
+class StageDebugger:
+    def __init__(self, enabled=False, request_id=None, folder=DEBUG_FOLDER,
+                 in_memory=DEBUG_IN_MEMORY, show=DEBUG_SHOW):
+        """
+        Quando habilitado, cada etapa é salva em `folder/<request_id>/` ou
+        guardada em memória (`images`). Com `show`, as imagens também são
+        exibidas com matplotlib, importado apenas nesse caso.
+        """
+        self.enabled = enabled
+        self.request_id = request_id or uuid.uuid4().hex[:12]
+        self.in_memory = in_memory
+        self.show = show
+        self.images = {}
+        self.directory = None if in_memory else os.path.join(folder, self.request_id)
+
+    @classmethod
+    def for_request(cls, force=False, **kwargs):
+        enabled = force or (DEBUG_SAMPLE_RATE > 0 and random.random() < DEBUG_SAMPLE_RATE)
+        return cls(enabled=enabled, **kwargs)
+
+    def capture(self, name, image, title=None):
+        if not self.enabled or image is None:
+            return
+
+        if self.in_memory:
+            self.images[name] = image.copy()
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            cv2.imwrite(os.path.join(self.directory, f'{name}.jpg'), image)
+
+        if self.show:
+            import matplotlib.pyplot as plt
+            plt.imshow(image, cmap='gray' if image.ndim == 2 else None)
+            plt.title(title or name)
+            plt.show()
+
+    def summary(self):
+        if not self.enabled:
+            return None
+        if self.in_memory:
+            return {'request_id': self.request_id, 'stages': list(self.images)}
+        logger.info(f'Imagens de depuração salvas em {self.directory}')
+        return {'request_id': self.request_id, 'directory': self.directory}
+
+
+# Instância desabilitada usada quando nenhuma depuração é pedida
+NO_DEBUG = StageDebugger(enabled=False)
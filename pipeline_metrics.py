@@ -0,0 +1,125 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites (em segundos) dos intervalos dos histogramas de latência
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Histograma cumulativo no formato do Prometheus, com um rótulo
+class Histogram:
+    def __init__(self, name, help_text, label, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_value, (counts, count, total) in sorted(self._series.items()):
+                label = f'{self.label}="{label_value}"'
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f'{self.name}_sum{{{label}}} {total}')
+                lines.append(f'{self.name}_count{{{label}}} {count}')
+        return lines
+
+
+# Requisições em andamento
+class Gauge:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self):
+        with self._lock:
+            self.value += 1
+
+    def dec(self):
+        with self._lock:
+            self.value -= 1
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge', f'{self.name} {self.value}']
+
+
+STAGE_SECONDS = Histogram('plate_ocr_stage_seconds', 'Duração de cada etapa do pipeline', 'stage')
+REQUESTS_IN_FLIGHT = Gauge('plate_ocr_requests_in_flight', 'Uploads sendo processados')
+
+# Tempos da requisição atual; cada thread (e cada tarefa do asyncio) tem o seu
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+# Tempo acumulado (ms) de cada etapa de uma requisição
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds * 1000
+
+    def as_dict(self):
+        timings = {name: round(ms, 2) for name, ms in self.stages.items()}
+        timings['total'] = round((time.perf_counter() - self.start) * 1000, 2)
+        return timings
+
+
+# Registra a duração de uma etapa no histograma e nos tempos da requisição atual
+def observe_stage(name, seconds):
+    STAGE_SECONDS.observe(name, seconds)
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+# Acompanha uma requisição: tempos por etapa, duração total e requisições em andamento
+@contextmanager
+def track_request():
+    timings = RequestTimings()
+    token = _current.set(timings)
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        yield timings
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        _current.reset(token)
+        STAGE_SECONDS.observe('total', time.perf_counter() - timings.start)
+
+
+# Texto do endpoint /metrics: histogramas, requisições em andamento e os valores informados
+def render_metrics(gauges):
+    """`gauges`: lista de (nome, descrição, valor) exportados como gauges."""
+    lines = STAGE_SECONDS.render() + REQUESTS_IN_FLIGHT.render()
+    for name, help_text, value in gauges:
+        if value is None:
+            continue
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {float(value)}']
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,115 @@
+import cv2
+import easyocr
+from loguru import logger
+
+from ocr_decoders import DECODERS, fuse_decoder_results, recognize_with_decoders
+from ocr_pool import get_reader_pool
+from ocr_profiles import get_profile, readtext_kwargs
+from pipeline_debug import NO_DEBUG
+from pipeline_metrics import stage
+from plate_decoder import decode_plate
+from plate_localizer import LOCALIZER_SCALE, PLATE_RECTIFY, crop_plate, locate_plate, rectify_plate
+from upload_io import load_image
+
+# Localização e OCR da placa, sem o servidor: importado pelos processos de OCR (ocr_workers)
+# e pelo processamento em lote sem criar o app Flask, a fila de trabalhos ou os streams.
+
+
+# Função para realizar OCR e filtragem de texto da placa
+class PlateDataAnalysis:
+    def __init__(self, reader=None):
+        # Usa um leitor do pool quando fornecido; senão carrega um novo
+        self.reader = reader if reader is not None else easyocr.Reader(get_profile()['languages'])
+        self.localization_tier = None
+
+    def process_image(self, image, debug=NO_DEBUG):
+        # Carregar a imagem (ou reaproveitar o array já decodificado)
+        img = load_image(image)
+
+        # Convertendo para escala de cinza
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        debug.capture('gray_image', gray, "Imagem em Escala de Cinza")
+
+        # Localizar a placa em níveis (quadrilátero, retângulo rotacionado, imagem
+        # inteira), cada um com orçamento de tempo; o nível usado vai na resposta
+        with stage('localize'):
+            location, self.localization_tier = locate_plate(gray, LOCALIZER_SCALE, debug)
+        logger.info(f'Placa localizada pelo nível {self.localization_tier}')
+        if location is None:
+            debug.capture('cropped_image', gray, "Imagem Inteira")
+            return gray
+
+        # Contorno encontrado (desenhado apenas na depuração)
+        if debug.enabled:
+            located = img.copy()
+            cv2.drawContours(located, [location], 0, (0, 255, 0), 3)
+            debug.capture('location_image', located, "Placa Localizada")
+
+        # Recorte direto pela geometria do contorno: retângulo envolvente com
+        # buffer, ou placa retificada por perspectiva em tamanho canônico
+        with stage('crop'):
+            if PLATE_RECTIFY and len(location) == 4:
+                cropped_image = rectify_plate(gray, location)
+            else:
+                cropped_image = crop_plate(gray, location)
+        debug.capture('cropped_image', cropped_image, "Imagem Recortada")
+
+        return cropped_image
+
+    def read_text_from_image(self, image, decoders=DECODERS, single_detection=True, debug=NO_DEBUG):
+        # Realiza o pré-processamento da imagem (recorte da placa)
+        cropped_image = self.process_image(image, debug)
+
+        if single_detection:
+            # Detecta o texto uma vez e executa só o reconhecimento para cada decodificador,
+            # combinando os resultados por votação em cada caixa
+            results_by_decoder = recognize_with_decoders(self.reader, cropped_image, decoders)
+            results = fuse_decoder_results(results_by_decoder)
+            logger.info(f'OCR results (fused from {len(decoders)} decoders): {results}')
+            return results
+
+        # Realizando OCR completo com cada decodificador
+        results = []
+        for decoder in decoders:
+            logger.info(f"Realizando OCR com o decodificador {decoder}...")
+            with stage(f'readtext_{decoder}'):
+                result = self.reader.readtext(cropped_image, decoder=decoder, **readtext_kwargs())
+            results.extend(result)  # Adiciona os resultados da execução ao total
+
+        logger.info(f'OCR results (combined from {len(decoders)} analyses): {results}')
+        return results
+
+    def filter_plates(self, results):
+        potential_plates = {}
+
+        for result in results:
+            text, confidence = result[1], result[2]
+            logger.info(f'Extracted text: {text} | Confidence: {confidence}')
+
+            # Decodifica por posição (Mercosul LLLNLNN ou antiga LLLNNNN), corrigindo
+            # caracteres confundíveis; a confiança já inclui a penalidade das correções
+            plate = decode_plate(text, confidence)
+            if plate is None or plate['confidence'] <= 0.3:
+                continue
+
+            # Mantém apenas a leitura de maior confiança de cada placa
+            current = potential_plates.get(plate['text'])
+            if current is None or plate['confidence'] > current['confidence']:
+                potential_plates[plate['text']] = {
+                    'text': plate['text'],
+                    'confidence': plate['confidence'],
+                    'raw_text': text,
+                    'format': plate['format']
+                }
+        return list(potential_plates.values()) if potential_plates else None
+
+
+# Localização, OCR e filtragem de um quadro com um leitor do pool.
+# Também é o handler padrão dos processos de OCR (ocr_workers).
+def ocr_frame(image, debug=NO_DEBUG):
+    with get_reader_pool().reader() as reader:
+        plate_analysis = PlateDataAnalysis(reader)
+        texts = plate_analysis.read_text_from_image(image, debug=debug)  # Detecção única + 3 decodificadores
+    with stage('filter_plates'):
+        text_plate = plate_analysis.filter_plates(texts)
+    return texts, text_plate, plate_analysis.localization_tier
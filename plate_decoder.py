@@ -0,0 +1,63 @@
+import re
+
+# Classe de caractere por posição: L = letra, N = número
+PLATE_FORMATS = {
+    'mercosul': 'LLLNLNN',  # ex: ABC1D23
+    'legacy': 'LLLNNNN',    # ex: ABC1234
+}
+
+# Correções de confusões comuns do OCR, aplicadas apenas quando a posição exige a outra classe
+LETTER_TO_DIGIT = {'O': '0', 'Q': '0', 'D': '0', 'U': '0', 'I': '1', 'L': '1', 'T': '1', 'J': '1',
+                   'Z': '2', 'S': '5', 'G': '6', 'B': '8', 'A': '4'}
+DIGIT_TO_LETTER = {'0': 'O', '1': 'I', '2': 'Z', '4': 'A', '5': 'S', '6': 'G', '7': 'T', '8': 'B'}
+
+# Fator aplicado à confiança a cada caractere corrigido e a cada caractere descartado
+CORRECTION_PENALTY = 0.85
+TRIM_PENALTY = 0.9
+
+
+def _decode_window(text, pattern):
+    chars = []
+    corrections = 0
+    for char, cls in zip(text, pattern):
+        if cls == 'L':
+            if char.isalpha():
+                chars.append(char)
+            elif char in DIGIT_TO_LETTER:
+                chars.append(DIGIT_TO_LETTER[char])
+                corrections += 1
+            else:
+                return None, None
+        else:
+            if char.isdigit():
+                chars.append(char)
+            elif char in LETTER_TO_DIGIT:
+                chars.append(LETTER_TO_DIGIT[char])
+                corrections += 1
+            else:
+                return None, None
+    return ''.join(chars), corrections
+
+
+# Decodifica a leitura do OCR respeitando a classe de cada posição da placa
+def decode_plate(text, confidence=1.0, formats=PLATE_FORMATS):
+    """
+    Testa os formatos Mercosul (LLLNLNN) e antigo (LLLNNNN) em cada janela de
+    7 caracteres da leitura (sem espaços e hífens), corrigindo caracteres
+    confundíveis conforme a classe exigida na posição. A confiança do OCR é
+    reduzida a cada correção e a cada caractere descartado; retorna o melhor
+    candidato ({'text', 'confidence', 'format', 'corrections'}) ou None.
+    """
+    normalized = re.sub(r'[^A-Z0-9]', '', text.upper())
+    best = None
+    for start in range(len(normalized) - 6):
+        window = normalized[start:start + 7]
+        trimmed = len(normalized) - 7
+        for name, pattern in formats.items():
+            plate, corrections = _decode_window(window, pattern)
+            if plate is None:
+                continue
+            score = confidence * CORRECTION_PENALTY ** corrections * TRIM_PENALTY ** trimmed
+            if best is None or score > best['confidence']:
+                best = {'text': plate, 'confidence': score, 'format': name, 'corrections': corrections}
+    return best
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from loguru import logger
+
+from plate_matcher import FUZZY_MAX_DISTANCE, PlateMatcher
+
+# Endpoint da API de cadastro que lista as placas (vazio desativa o índice local).
+# Resposta esperada: lista de placas (ou de objetos com o campo `plate`), ou
+# {"plates": [...]} para a carga completa. Com ?since=<cursor>, a API pode
+# responder só as alterações: {"added": [...], "removed": [...], "cursor": ...}.
+PLATE_INDEX_URL = os.environ.get('PLATE_INDEX_URL', '')
+# Cópia local do índice; não pode ficar em uma pasta servida por HTTP (como outputs/)
+PLATE_INDEX_SNAPSHOT = os.environ.get('PLATE_INDEX_SNAPSHOT', './data/plate_index.json')
+PLATE_INDEX_REFRESH = float(os.environ.get('PLATE_INDEX_REFRESH', 60))
+PLATE_INDEX_TIMEOUT = float(os.environ.get('PLATE_INDEX_TIMEOUT', 5))
+
+
+def _normalize(plate):
+    return plate.replace(' ', '').replace('-', '').upper()
+
+
+def _plates_from(items):
+    plates = set()
+    for item in items or []:
+        if isinstance(item, dict):
+            item = item.get('plate') or item.get('placa')
+        if item:
+            plates.add(_normalize(str(item)))
+    return plates
+
+
+# Índice local das placas cadastradas, sincronizado com a API de cadastro
+class PlateIndex:
+    def __init__(self, url=PLATE_INDEX_URL, snapshot_path=PLATE_INDEX_SNAPSHOT,
+                 refresh_interval=PLATE_INDEX_REFRESH, timeout=PLATE_INDEX_TIMEOUT):
+        """
+        As consultas são feitas em um `frozenset` trocado atomicamente a cada
+        sincronização. Uma cópia é gravada em `snapshot_path` para que o índice
+        funcione mesmo com a API de cadastro fora do ar.
+        """
+        self.url = url
+        self.snapshot_path = snapshot_path
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._plates = None
+        self._matcher = None
+        self._cursor = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.last_sync = None
+        self.sync_errors = 0
+
+    @property
+    def ready(self):
+        return self._plates is not None
+
+    def __contains__(self, plate):
+        plates = self._plates
+        return plates is not None and _normalize(plate) in plates
+
+    def __len__(self):
+        return len(self._plates) if self._plates is not None else 0
+
+    def _set_plates(self, plates):
+        # O índice aproximado é reconstruído antes da troca, que é atômica
+        matcher = PlateMatcher(plates)
+        self._matcher, self._plates = matcher, frozenset(matcher.plates)
+
+    # Placa cadastrada mais próxima da leitura: (placa, distância) ou (None, None)
+    def match(self, plate, max_distance=FUZZY_MAX_DISTANCE):
+        matcher = self._matcher
+        if matcher is None:
+            return None, None
+        return matcher.match(plate, max_distance)
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self._set_plates(_plates_from(data.get('plates')))
+        self._cursor = data.get('cursor')
+        logger.info(f'Índice de placas carregado do arquivo local ({len(self._plates)} placas)')
+        return True
+
+    def _save_snapshot(self):
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'plates': sorted(self._plates), 'cursor': self._cursor}, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def sync(self):
+        """Busca a lista completa (ou as alterações desde o último cursor) na API."""
+        params = {'since': self._cursor} if self._cursor is not None and self.ready else None
+        try:
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            self.sync_errors += 1
+            logger.error(f'Erro ao sincronizar o índice de placas: {e}')
+            return False
+
+        with self._lock:
+            if isinstance(data, dict) and ('added' in data or 'removed' in data) and self.ready:
+                plates = (set(self._plates) | _plates_from(data.get('added'))) - _plates_from(data.get('removed'))
+            elif isinstance(data, dict):
+                plates = _plates_from(data.get('plates'))
+            else:
+                plates = _plates_from(data)
+            self._cursor = data.get('cursor') if isinstance(data, dict) else None
+            self._set_plates(plates)
+            self.last_sync = time.time()
+
+        try:
+            self._save_snapshot()
+        except OSError as e:
+            logger.error(f'Erro ao gravar o índice de placas: {e}')
+        logger.info(f'Índice de placas sincronizado ({len(self._plates)} placas)')
+        return True
+
+    def load(self):
+        """Carga inicial: API de cadastro e, se indisponível, o arquivo local."""
+        if not self.sync():
+            self._load_snapshot()
+        return self.ready
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.sync()
+
+    def start(self):
+        self.load()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='plate-index-sync', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def metrics(self):
+        return {
+            'ready': self.ready,
+            'size': len(self),
+            'last_sync': self.last_sync,
+            'sync_errors': self.sync_errors,
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+# Retorna o índice global (ou None quando PLATE_INDEX_URL não está configurado)
+def get_plate_index():
+    global _index
+    if not PLATE_INDEX_URL:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = PlateIndex().start()
+        return _index
@@ -0,0 +1,336 @@
+import os
+import time
+
+import cv2
+import imutils
+import numpy as np
+
+from loguru import logger
+
+from pipeline_debug import NO_DEBUG
+
+# Escala da busca grosseira (1.0 desativa a pirâmide) e largura mínima da imagem reduzida
+LOCALIZER_SCALE = float(os.environ.get('LOCALIZER_SCALE', 0.25))
+LOCALIZER_MIN_WIDTH = int(os.environ.get('LOCALIZER_MIN_WIDTH', 320))
+# A candidata da busca reduzida é o bloco de caracteres: a placa tem cerca de 2x a altura do texto
+# (faixa azul acima, borda abaixo) e a proporção Mercosul (400 x 130 mm). A janela do refinamento
+# cobre essa placa presumida mais a margem (fração do tamanho dela)
+PLATE_TEXT_HEIGHT_RATIO = 2.2
+PLATE_ASPECT = 400 / 130
+LOCALIZER_MARGIN = 0.15
+# Tolerância da aproximação poligonal no refinamento, relativa ao perímetro do contorno
+LOCALIZER_EPSILON_RATIO = 0.02
+# Proporção largura/altura aceita para uma placa (Mercosul ~3.1, com perspectiva)
+PLATE_MIN_ASPECT = 1.5
+PLATE_MAX_ASPECT = 7.0
+# Inclinação máxima (graus) do lado maior de um retângulo rotacionado para ser considerado placa
+PLATE_MAX_TILT = 30.0
+# Largura mínima (pixels e fração da imagem) de um quadrilátero aceito pela busca em resolução total
+PLATE_MIN_WIDTH = 40
+PLATE_MIN_WIDTH_RATIO = 0.04
+# Orçamento de tempo (ms) de cada nível de localização; estourado, os níveis
+# seguintes que exigem busca são pulados
+LOCALIZER_BUDGET_MS = {
+    'quadrilateral': float(os.environ.get('LOCALIZER_QUAD_BUDGET_MS', 250)),
+    'min_area_rect': float(os.environ.get('LOCALIZER_RECT_BUDGET_MS', 100)),
+}
+# Retificação por perspectiva do recorte (placa Mercosul: 400 x 130 mm)
+PLATE_RECTIFY = os.environ.get('PLATE_RECTIFY', '0') == '1'
+PLATE_CANONICAL_SIZE = (400, 130)
+
+
+# Procura o maior contorno com 4 vértices (pipeline clássico filtro bilateral + Canny). Com
+# `epsilon_ratio`, a tolerância da aproximação é proporcional ao perímetro de cada contorno
+# (cantos arredondados de uma placa grande não ficam com 4 vértices com 10 px fixos). Com
+# `min_width`, só aceita quadriláteros com proporção de placa e pelo menos essa largura.
+def find_plate_quadrilateral(gray, epsilon=10, debug=NO_DEBUG, epsilon_ratio=None, min_width=None):
+    bfilter = cv2.bilateralFilter(gray, 11, 11, 17)
+    debug.capture('bilateral_filtered_image', bfilter, "Imagem com Filtro Bilateral")
+
+    edged = cv2.Canny(bfilter, 30, 200)
+    debug.capture('edged_image', edged, "Imagem com Bordas Detectadas")
+
+    keypoints = cv2.findContours(edged, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    contours = imutils.grab_contours(keypoints)
+
+    # Ordenar os contornos e pegar os 10 maiores
+    contours = sorted(contours, key=cv2.contourArea, reverse=True)[:10]
+    for contour in contours:
+        if epsilon_ratio is not None:
+            epsilon = epsilon_ratio * cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, epsilon, True)
+        if len(approx) != 4:
+            continue
+        if min_width is not None:
+            w, h = cv2.boundingRect(approx)[2:]
+            if w < min_width or not _plausible_plate(w, h):
+                continue
+        return approx
+    return None
+
+
+def _effective_scale(gray, scale):
+    width = gray.shape[1]
+    return min(1.0, max(scale, LOCALIZER_MIN_WIDTH / float(width)))
+
+
+def _plausible_plate(w, h):
+    return h > 0 and PLATE_MIN_ASPECT <= w / float(h) <= PLATE_MAX_ASPECT
+
+
+# Largura mínima de uma placa legível na imagem
+def _min_plate_width(gray):
+    return max(PLATE_MIN_WIDTH, PLATE_MIN_WIDTH_RATIO * gray.shape[1])
+
+
+def _text_kernel(width):
+    return cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, int(width * 0.03)) | 1, max(3, int(width * 0.01)) | 1))
+
+
+# Energia de gradiente horizontal do black-hat: realça os caracteres escuros sobre fundo claro
+def _text_gradient(small, kernel=None):
+    kernel = kernel if kernel is not None else _text_kernel(small.shape[1])
+    blackhat = cv2.morphologyEx(small, cv2.MORPH_BLACKHAT, kernel)
+    grad = np.absolute(cv2.Sobel(blackhat, cv2.CV_32F, 1, 0, ksize=-1))
+    return cv2.normalize(grad, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+
+# Regiões candidatas na imagem reduzida: blocos de texto escuro com proporção de placa
+def _coarse_candidates(small, max_candidates):
+    """
+    Usa black-hat + gradiente horizontal para realçar os caracteres escuros
+    sobre fundo claro e fecha os blocos com um kernel proporcional à largura
+    da imagem. Os blocos são ordenados pela energia de gradiente.
+    """
+    width = small.shape[1]
+    kernel = _text_kernel(width)
+    grad = cv2.GaussianBlur(_text_gradient(small, kernel), (5, 5), 0)
+    grad = cv2.morphologyEx(grad, cv2.MORPH_CLOSE, kernel)
+    thresh = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
+    thresh = cv2.dilate(cv2.erode(thresh, None, iterations=2), None, iterations=2)
+
+    keypoints = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_width = 0.04 * width
+    candidates = []
+    for contour in imutils.grab_contours(keypoints):
+        x, y, w, h = cv2.boundingRect(contour)
+        if w >= min_width and _plausible_plate(w, h):
+            score = float(grad[y:y + h, x:x + w].sum())
+            candidates.append((score, (x, y, w, h)))
+    candidates.sort(key=lambda item: item[0], reverse=True)
+    return [box for _, box in candidates[:max_candidates]]
+
+
+# Janela (x1, y1, x2, y2) da placa presumida em torno do bloco de texto (x, y, w, h), com margem
+def _plate_window(shape, x, y, w, h):
+    plate_h = h * PLATE_TEXT_HEIGHT_RATIO
+    plate_w = max(w, plate_h * PLATE_ASPECT)
+    cx, cy = x + w / 2, y + h / 2
+    half_w = plate_w * (0.5 + LOCALIZER_MARGIN) + 2
+    half_h = plate_h * (0.5 + LOCALIZER_MARGIN) + 2
+    return (max(0, int(cx - half_w)), max(0, int(cy - half_h)),
+            min(shape[1], int(cx + half_w)), min(shape[0], int(cy + half_h)))
+
+
+def _box_to_location(x1, y1, x2, y2):
+    return np.array([[[x1, y1]], [[x2, y1]], [[x2, y2]], [[x1, y2]]], dtype=np.int32)
+
+
+# Localização em duas etapas: busca na imagem reduzida e refinamento só na região candidata
+def find_plate_coarse_to_fine(gray, scale=LOCALIZER_SCALE, debug=NO_DEBUG, budget=None):
+    """
+    Procura regiões com proporção de placa em uma versão reduzida da imagem,
+    mapeia a melhor de volta para a resolução total e executa a busca do
+    quadrilátero apenas nessa região (com margem). Retorna (location, nível):
+    'quadrilateral' quando o refinamento encontra a placa, 'coarse_box' com o
+    retângulo mapeado quando não encontra (ou o orçamento acabou antes do
+    refinamento) e (None, None) quando a imagem reduzida não tem candidatas.
+    """
+    scale = _effective_scale(gray, scale)
+    if scale >= 1.0:
+        location = find_plate_quadrilateral(gray, debug=debug, min_width=_min_plate_width(gray))
+        return (location, 'quadrilateral') if location is not None else (None, None)
+
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    debug.capture('coarse_image', small, "Imagem Reduzida")
+
+    candidates = _coarse_candidates(small, 1)
+    if not candidates:
+        return None, None
+
+    # Mapeia o bloco de texto para a resolução total e estende à placa presumida, com margem
+    x1, y1, x2, y2 = _plate_window(gray.shape, *(v / scale for v in candidates[0]))
+    coarse_box = _box_to_location(x1, y1, x2 - 1, y2 - 1)
+    if budget is not None and budget.exceeded():
+        return coarse_box, 'coarse_box'
+
+    # Refinamento: quadrilátero da placa apenas dentro da região, contendo o bloco de texto
+    refined = find_plate_quadrilateral(gray[y1:y2, x1:x2], epsilon_ratio=LOCALIZER_EPSILON_RATIO)
+    if refined is not None:
+        refined = refined + np.array([x1, y1], dtype=refined.dtype)
+        x, y, w, h = (v / scale for v in candidates[0])
+        center = (float(x + w / 2), float(y + h / 2))
+        if (_plausible_plate(*cv2.boundingRect(refined)[2:])
+                and cv2.pointPolygonTest(refined, center, False) >= 0):
+            return refined, 'quadrilateral'
+    return coarse_box, 'coarse_box'
+
+
+# Inclinação (graus, 0 = horizontal) do lado maior de um retângulo rotacionado
+def _rect_tilt(points):
+    first, second = points[1] - points[0], points[2] - points[1]
+    dx, dy = first if np.hypot(*first) >= np.hypot(*second) else second
+    angle = abs(np.degrees(np.arctan2(dy, dx)))
+    return min(angle, 180.0 - angle)
+
+
+# Retângulos rotacionados (minAreaRect) com proporção de placa na imagem reduzida
+def find_plate_min_area_rect(gray, scale=LOCALIZER_SCALE, containing=None):
+    """
+    Entre os retângulos com proporção e inclinação de placa, escolhe o de maior
+    energia média de gradiente dos caracteres (como _coarse_candidates), e não
+    o de maior área: emblemas e grades grandes têm bordas, mas não texto denso.
+    Com `containing` (ponto em resolução total), só aceita retângulos que o
+    contêm.
+    """
+    scale = _effective_scale(gray, scale)
+    small = gray if scale >= 1.0 else cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    edged = cv2.Canny(cv2.bilateralFilter(small, 5, 11, 17), 30, 200)
+    edged = cv2.dilate(edged, None, iterations=1)
+    keypoints = cv2.findContours(edged, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    grad = _text_gradient(small)
+
+    # Descarta retângulos que cobrem quase o quadro inteiro (bordas da imagem)
+    min_width, max_width = 0.04 * small.shape[1], 0.95 * small.shape[1]
+    best, best_score = None, 0.0
+    for contour in imutils.grab_contours(keypoints):
+        rect = cv2.minAreaRect(contour)
+        w, h = max(rect[1]), min(rect[1])
+        if not (min_width <= w <= max_width and _plausible_plate(w, h)):
+            continue
+        points = cv2.boxPoints(rect)
+        if _rect_tilt(points) > PLATE_MAX_TILT:
+            continue
+        if containing is not None and cv2.pointPolygonTest(points / scale, containing, False) < 0:
+            continue
+        mask = np.zeros(small.shape, np.uint8)
+        cv2.fillConvexPoly(mask, np.round(points).astype(np.int32), 1)
+        score = float(grad[mask > 0].sum())
+        if score > best_score:
+            best, best_score = points, score
+    if best is None:
+        return None
+    return np.round(best / scale).astype(np.int32).reshape(4, 1, 2)
+
+
+# Orçamento de tempo de um nível. As chamadas do OpenCV não são interrompidas: o orçamento é
+# conferido antes de cada etapa, e uma etapa cujo custo estimado não cabe no restante é pulada.
+class _TierBudget:
+    def __init__(self, tier, budget_ms):
+        self.tier = tier
+        self.budget_ms = budget_ms
+        self.start = time.perf_counter()
+        self._warned = False
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def _warn(self, message):
+        if not self._warned:
+            self._warned = True
+            logger.warning(f'Localização ({self.tier}): {message}')
+
+    def exceeded(self):
+        elapsed = self.elapsed_ms()
+        if elapsed > self.budget_ms:
+            self._warn(f'orçamento estourado: {elapsed:.1f} ms > {self.budget_ms:.0f} ms')
+            return True
+        return False
+
+    def allows(self, estimate_ms):
+        if self.exceeded():
+            return False
+        if self.elapsed_ms() + estimate_ms > self.budget_ms:
+            self._warn(f'etapa pulada, custo estimado de {estimate_ms:.1f} ms não cabe no orçamento de '
+                       f'{self.budget_ms:.0f} ms')
+            return False
+        return True
+
+
+# Localização em níveis: quadrilátero, retângulo rotacionado, região da busca reduzida e, por fim, imagem inteira
+def locate_plate(gray, scale=LOCALIZER_SCALE, debug=NO_DEBUG, budgets=None):
+    """
+    Retorna (location, nível). `location` é None no nível 'full_frame', quando
+    nenhum nível encontrou a placa; nesse caso o OCR deve rodar na imagem
+    inteira. Com o orçamento de um nível estourado, os níveis seguintes que
+    exigem busca são pulados.
+    """
+    budgets = budgets or LOCALIZER_BUDGET_MS
+
+    # Nível 1: quadrilátero (busca na pirâmide e, sem candidata, em resolução total)
+    budget = _TierBudget('quadrilateral', budgets['quadrilateral'])
+    coarse_box = None
+    effective_scale = _effective_scale(gray, scale)
+    if effective_scale < 1.0:
+        location, tier = find_plate_coarse_to_fine(gray, scale, debug, budget)
+        if tier == 'quadrilateral':
+            return location, tier
+        coarse_box = location
+        # Sem candidata na imagem reduzida: a busca em resolução total custa ~1/escala² da reduzida
+        if coarse_box is None and budget.allows(budget.elapsed_ms() / effective_scale ** 2):
+            location = find_plate_quadrilateral(gray, debug=debug, min_width=_min_plate_width(gray))
+            if location is not None:
+                return location, 'quadrilateral'
+    else:
+        location = find_plate_quadrilateral(gray, debug=debug, min_width=_min_plate_width(gray))
+        if location is not None:
+            return location, 'quadrilateral'
+
+    # Nível 2: retângulo rotacionado com mais cara de placa (na imagem reduzida). Com uma região
+    # candidata da busca reduzida, só vale um retângulo que contém o centro dela: fora, ele contradiz
+    # o bloco de texto e a região é melhor que ele
+    if not budget.exceeded():
+        budget = _TierBudget('min_area_rect', budgets['min_area_rect'])
+        center = None
+        if coarse_box is not None:
+            center = tuple(float(v) for v in coarse_box.reshape(4, 2).mean(axis=0))
+        location = find_plate_min_area_rect(gray, scale, containing=center)
+        budget.exceeded()
+        if location is not None:
+            return location, 'min_area_rect'
+
+    # Nível 3: região candidata da busca reduzida, sem quadrilátero confirmado
+    if coarse_box is not None:
+        return coarse_box, 'coarse_box'
+
+    # Nível 4: sem localização, OCR na imagem inteira
+    return None, 'full_frame'
+
+
+# Recorte da placa a partir da geometria do contorno (sem máscara do quadro inteiro)
+def crop_plate(gray, location, buffer=2):
+    x, y, w, h = cv2.boundingRect(location)
+    x, y = max(0, x), max(0, y)
+    return gray[y:y + h + buffer, x:x + w + buffer]
+
+
+# Ordena os 4 vértices como superior-esquerdo, superior-direito, inferior-direito, inferior-esquerdo
+def order_quadrilateral(location):
+    points = location.reshape(4, 2).astype(np.float32)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([
+        points[np.argmin(sums)],
+        points[np.argmin(diffs)],
+        points[np.argmax(sums)],
+        points[np.argmax(diffs)],
+    ], dtype=np.float32)
+
+
+# Recorte retificado por perspectiva em tamanho canônico para o reconhecedor
+def rectify_plate(gray, location, size=None):
+    width, height = size or PLATE_CANONICAL_SIZE
+    target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(order_quadrilateral(location), target)
+    return cv2.warpPerspective(gray, matrix, (width, height), flags=cv2.INTER_LINEAR)
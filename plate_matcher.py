@@ -0,0 +1,157 @@
+import os
+import re
+from collections import defaultdict
+from itertools import combinations
+
+# Distância máxima entre a leitura do OCR e a placa cadastrada associada (informativa). Com 2 edições,
+# uma placa aleatória não cadastrada fica perto de alguma cadastrada com frequência alta demais
+FUZZY_MAX_DISTANCE = int(os.environ.get('PLATE_FUZZY_MAX_DISTANCE', 1))
+PLATE_LENGTH = 7
+
+# Trechos da placa usados no índice (posições [início, fim)); com no máximo 2
+# substituições, pelo menos 2 dos 4 trechos ficam intactos (princípio da casa dos pombos)
+_SEGMENTS = ((0, 2), (2, 4), (4, 6), (6, 7))
+_SEGMENT_PAIRS = tuple(combinations(range(len(_SEGMENTS)), 2))
+
+# Pares de caracteres que o OCR costuma confundir: substituições entre eles
+# custam menos no desempate entre candidatas com a mesma distância
+CONFUSABLE_PAIRS = {
+    frozenset(pair) for pair in (
+        ('O', '0'), ('Q', '0'), ('D', '0'), ('I', '1'), ('L', '1'), ('T', '1'),
+        ('B', '8'), ('S', '5'), ('Z', '2'), ('G', '6'), ('A', '4'), ('M', 'W'),
+        ('U', 'V'), ('E', 'F'), ('O', 'Q'), ('C', 'G'),
+    )
+}
+
+
+def normalize_plate(text):
+    return re.sub(r'[^A-Z0-9]', '', text.upper())
+
+
+def _pair_keys(plate):
+    parts = [plate[start:end] for start, end in _SEGMENTS]
+    return [(i, j, parts[i], parts[j]) for i, j in _SEGMENT_PAIRS]
+
+
+def _substitution_cost(a, b):
+    return 0.0 if a == b else (0.5 if frozenset((a, b)) in CONFUSABLE_PAIRS else 1.0)
+
+
+# Posição em que os formatos Mercosul (LLLNLNN) e antigo (LLLNNNN) diferem: é a única em que
+# decode_plate não consegue decidir entre letra e número
+FORMAT_POSITION = 4
+
+
+# A leitura difere da placa só pela troca letra/número confundível na posição que separa os formatos
+# (ex.: ABC1G23 lida para ABC1623). Nas demais posições decode_plate já impôs a classe do caractere,
+# então uma diferença restante (ex.: E/F) é outra placa válida, não um erro do OCR
+def format_confusion_only(text, plate):
+    text = normalize_plate(text)
+    if len(text) != PLATE_LENGTH or len(plate) != PLATE_LENGTH:
+        return False
+    differences = [i for i, (a, b) in enumerate(zip(text, plate)) if a != b]
+    if differences != [FORMAT_POSITION]:
+        return False
+    a, b = text[FORMAT_POSITION], plate[FORMAT_POSITION]
+    return a.isalpha() != b.isalpha() and frozenset((a, b)) in CONFUSABLE_PAIRS
+
+
+def _hamming(a, b, limit):
+    distance = 0
+    for x, y in zip(a, b):
+        if x != y:
+            distance += 1
+            if distance > limit:
+                break
+    return distance
+
+
+# Distância de Levenshtein com corte: retorna `limit + 1` assim que ela não puder ficar <= limit
+def levenshtein(a, b, limit=None):
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+# Busca aproximada de placas cadastradas por distância de edição
+class PlateMatcher:
+    def __init__(self, plates=()):
+        """
+        Índice para busca da placa cadastrada mais próxima de uma leitura do OCR:
+        - leituras com 7 caracteres: pares de trechos exatos (substituições);
+        - leituras com 8 caracteres: remoção de um caractere + busca acima;
+        - leituras com 6 caracteres: prefixo/sufixo de 3 caracteres + Levenshtein.
+        """
+        self.plates = set()
+        self._pairs = defaultdict(list)
+        self._affixes = defaultdict(list)
+        for plate in plates:
+            self.add(plate)
+
+    def __len__(self):
+        return len(self.plates)
+
+    def add(self, plate):
+        plate = normalize_plate(plate)
+        if plate in self.plates:
+            return
+        self.plates.add(plate)
+        if len(plate) == PLATE_LENGTH:
+            for key in _pair_keys(plate):
+                self._pairs[key].append(plate)
+        self._affixes[('prefix', plate[:3])].append(plate)
+        self._affixes[('suffix', plate[-3:])].append(plate)
+
+    def _same_length_candidates(self, text, limit):
+        seen = set()
+        for key in _pair_keys(text):
+            for plate in self._pairs.get(key, ()):
+                if plate not in seen:
+                    seen.add(plate)
+                    distance = _hamming(text, plate, limit)
+                    if distance <= limit:
+                        yield plate, distance
+
+    def _candidates(self, text, max_distance):
+        if len(text) == PLATE_LENGTH:
+            yield from self._same_length_candidates(text, max_distance)
+        elif len(text) == PLATE_LENGTH + 1:
+            # Um caractere a mais (ex.: ruído lido como letra): remove cada posição
+            for i in range(len(text)):
+                for plate, distance in self._same_length_candidates(text[:i] + text[i + 1:], max_distance - 1):
+                    yield plate, distance + 1
+        elif len(text) == PLATE_LENGTH - 1:
+            # Um caractere a menos: candidatas que compartilham prefixo ou sufixo
+            seen = set()
+            for key in (('prefix', text[:3]), ('suffix', text[-3:])):
+                for plate in self._affixes.get(key, ()):
+                    if plate not in seen:
+                        seen.add(plate)
+                        distance = levenshtein(text, plate, max_distance)
+                        if distance <= max_distance:
+                            yield plate, distance
+
+    def match(self, text, max_distance=FUZZY_MAX_DISTANCE):
+        """Retorna (placa, distância) da cadastrada mais próxima, ou (None, None)."""
+        text = normalize_plate(text)
+        if text in self.plates:
+            return text, 0
+
+        best, best_key = None, None
+        for plate, distance in self._candidates(text, max_distance):
+            if len(plate) == len(text):
+                cost = sum(_substitution_cost(a, b) for a, b in zip(text, plate))
+            else:
+                cost = float(distance)
+            key = (distance, cost, plate)
+            if best_key is None or key < best_key:
+                best, best_key = plate, key
+        if best is None:
+            return None, None
+        return best, best_key[0]
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+
+from plate_index import get_plate_index
+from plate_matcher import format_confusion_only
+
+# Configuração da API de placas (Adonis js)
+PLATE_API_URL = os.environ.get('PLATE_API_URL', 'http://localhost:3555/search-plate')
+PLATE_API_CONNECT_TIMEOUT = float(os.environ.get('PLATE_API_CONNECT_TIMEOUT', 1.0))
+PLATE_API_READ_TIMEOUT = float(os.environ.get('PLATE_API_READ_TIMEOUT', 2.0))
+PLATE_CACHE_SIZE = int(os.environ.get('PLATE_CACHE_SIZE', 1024))
+PLATE_CACHE_TTL = float(os.environ.get('PLATE_CACHE_TTL', 60))
+PLATE_VERIFY_WORKERS = int(os.environ.get('PLATE_VERIFY_WORKERS', 4))
+
+
+# Cache LRU com expiração (TTL) por entrada
+class TTLCache:
+    def __init__(self, maxsize=PLATE_CACHE_SIZE, ttl=PLATE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Cliente da API de placas com conexões reaproveitadas, timeouts e cache
+class PlateVerificationClient:
+    def __init__(self, url=PLATE_API_URL, timeout=(PLATE_API_CONNECT_TIMEOUT, PLATE_API_READ_TIMEOUT),
+                 cache=None, max_workers=PLATE_VERIFY_WORKERS, index=None):
+        self.url = url
+        # Índice local de placas cadastradas; quando pronto, dispensa a consulta HTTP
+        self.index = index
+        self.timeout = timeout
+        self.cache = cache if cache is not None else TTLCache()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='plate-verify')
+        self._max_workers = max_workers
+        # Cliente HTTP assíncrono (httpx), criado no primeiro uso pelo servidor ASGI
+        self._async_client = None
+
+    def _request(self, plate):
+        response = self.session.get(self.url, params={'plate': plate}, timeout=self.timeout)
+        data = response.json()
+        return data.get('message') == 'Placa cadastrada'
+
+    def check(self, plate):
+        return self.verify(plate)['verification']
+
+    def verify(self, plate):
+        """
+        Retorna {'verification', 'match', 'distance'}. Com o índice local pronto,
+        uma leitura que não bate exatamente é comparada com a placa cadastrada
+        mais próxima (até FUZZY_MAX_DISTANCE edições); `verification` só é
+        verdadeiro para a placa exata ou que difere só pela troca letra/número
+        na posição que separa os formatos Mercosul e antigo.
+        """
+        if self.index is not None and self.index.ready:
+            return self._verify_with_index(plate)
+
+        cached = self.cache.get(plate)
+        if cached is None:
+            try:
+                cached = self._request(plate)
+            except (requests.RequestException, ValueError) as e:
+                # Erros não são guardados no cache para que a próxima tentativa consulte a API
+                logger.error(f'Erro ao verificar placa {plate}: {e}')
+                return self._error_result()
+            logger.info(f'Placa {plate} verificada na API: {cached}')
+            self.cache.set(plate, cached)
+        return self._api_result(plate, cached)
+
+    def _verify_with_index(self, plate):
+        match, distance = self.index.match(plate)
+        # A placa próxima só libera quando a única diferença é a troca letra/número na posição que
+        # separa Mercosul e antigo (ex.: G/6); nos demais casos `match` e `distance` são apenas informativos
+        verified = match is not None and (distance == 0 or format_confusion_only(plate, match))
+        if match is not None and distance > 0:
+            logger.info(f'Placa {plate} associada a {match} (distância {distance}, verificada: {verified})')
+        return {'verification': verified, 'match': match, 'distance': distance}
+
+    # Falha na consulta: a placa não é liberada e a resposta não deve ser reaproveitada por nenhum cache
+    @staticmethod
+    def _error_result():
+        return {'verification': False, 'match': None, 'distance': None, 'error': True}
+
+    @staticmethod
+    def _api_result(plate, registered):
+        return {'verification': registered, 'match': plate if registered else None, 'distance': 0 if registered else None}
+
+    # Versão assíncrona de verify, para o servidor ASGI (httpx é importado só quando usado)
+    async def averify(self, plate):
+        import httpx
+
+        if self.index is not None and self.index.ready:
+            return self._verify_with_index(plate)
+
+        cached = self.cache.get(plate)
+        if cached is None:
+            if self._async_client is None:
+                connect, read = self.timeout
+                self._async_client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(read, connect=connect),
+                    limits=httpx.Limits(max_connections=self._max_workers))
+            try:
+                response = await self._async_client.get(self.url, params={'plate': plate})
+                cached = response.json().get('message') == 'Placa cadastrada'
+            except (httpx.HTTPError, ValueError) as e:
+                logger.error(f'Erro ao verificar placa {plate}: {e}')
+                return self._error_result()
+            logger.info(f'Placa {plate} verificada na API: {cached}')
+            self.cache.set(plate, cached)
+        return self._api_result(plate, cached)
+
+    async def averify_many(self, plates):
+        unique = list(dict.fromkeys(plates))
+        return dict(zip(unique, await asyncio.gather(*(self.averify(plate) for plate in unique))))
+
+    # Verifica todas as placas candidatas de um quadro em paralelo
+    def verify_many(self, plates):
+        unique = list(dict.fromkeys(plates))
+        return dict(zip(unique, self._executor.map(self.verify, unique)))
+
+    def check_many(self, plates):
+        return {plate: result['verification'] for plate, result in self.verify_many(plates).items()}
+
+    def metrics(self):
+        metrics = {
+            'cache_size': len(self.cache),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+        }
+        if self.index is not None:
+            metrics['index'] = self.index.metrics()
+        return metrics
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+# Retorna o cliente global, criando-o na primeira chamada
+def get_verification_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = PlateVerificationClient(index=get_plate_index())
+        return _client
@@ -0,0 +1,72 @@
+import os
+import threading
+
+import cv2
+
+# Largura da miniatura usada na subtração de fundo
+PRESENCE_THUMB_WIDTH = int(os.environ.get('PRESENCE_THUMB_WIDTH', 160))
+# Fração mínima de pixels em primeiro plano para considerar que há um veículo
+PRESENCE_MIN_FOREGROUND = float(os.environ.get('PRESENCE_MIN_FOREGROUND', 0.02))
+# Quadros iniciais de cada câmera sempre processados, enquanto o fundo é aprendido
+PRESENCE_WARMUP_FRAMES = int(os.environ.get('PRESENCE_WARMUP_FRAMES', 10))
+PRESENCE_ENABLED = os.environ.get('PRESENCE_ENABLED', '1') == '1'
+
+
+# Detector de presença de veículo por câmera (subtração de fundo MOG2 em miniatura)
+class PresenceDetector:
+    def __init__(self):
+        self._subtractor = cv2.createBackgroundSubtractorMOG2(history=200, varThreshold=25, detectShadows=False)
+        self._frames = 0
+        self._lock = threading.Lock()
+
+    def _thumbnail(self, image):
+        height, width = image.shape[:2]
+        scale = PRESENCE_THUMB_WIDTH / float(width)
+        thumb = cv2.resize(image, (PRESENCE_THUMB_WIDTH, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        if thumb.ndim == 3:
+            thumb = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(thumb, (5, 5), 0)
+
+    def check(self, image):
+        """Retorna (há_veículo, fração_em_primeiro_plano)."""
+        thumb = self._thumbnail(image)
+        with self._lock:
+            mask = self._subtractor.apply(thumb)
+            self._frames += 1
+            warming_up = self._frames <= PRESENCE_WARMUP_FRAMES
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, None)
+        ratio = cv2.countNonZero(mask) / float(mask.size)
+        return warming_up or ratio >= PRESENCE_MIN_FOREGROUND, ratio
+
+
+# Um detector por câmera
+class PresenceGate:
+    def __init__(self):
+        self._detectors = {}
+        self._lock = threading.Lock()
+        self.empty_frames = 0
+        self.vehicle_frames = 0
+
+    def check(self, camera_id, image):
+        with self._lock:
+            detector = self._detectors.get(camera_id)
+            if detector is None:
+                detector = self._detectors[camera_id] = PresenceDetector()
+        present, ratio = detector.check(image)
+        if present:
+            self.vehicle_frames += 1
+        else:
+            self.empty_frames += 1
+        return present, ratio
+
+    def metrics(self):
+        total = self.empty_frames + self.vehicle_frames
+        return {
+            'empty_frames': self.empty_frames,
+            'vehicle_frames': self.vehicle_frames,
+            'empty_ratio': self.empty_frames / total if total else 0.0,
+            'cameras': len(self._detectors),
+        }
+
+
+presence_gate = PresenceGate()
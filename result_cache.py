@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from loguru import logger
+
+from plate_verification import PLATE_CACHE_TTL
+
+# Número máximo de respostas guardadas (LRU)
+RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 512))
+# Validade de uma resposta em segundos, para que a verificação na API seja refeita. Limitada ao
+# PLATE_CACHE_TTL da verificação, que não pode ser estendido por este cache
+RESULT_CACHE_TTL = min(float(os.environ.get('RESULT_CACHE_TTL', PLATE_CACHE_TTL)) or PLATE_CACHE_TTL, PLATE_CACHE_TTL)
+# Pasta para persistir as respostas entre reinícios (vazio = apenas em memória)
+RESULT_CACHE_DIR = os.environ.get('RESULT_CACHE_DIR', '')
+RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', '1') == '1' and RESULT_CACHE_TTL > 0
+
+
+# Chave de conteúdo: BLAKE2b dos bytes enviados
+def content_key(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# Respostas do /upload indexadas pelo hash do conteúdo da imagem
+class ResultCache:
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, directory=RESULT_CACHE_DIR):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.directory = directory or None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _expired(self, stored_at):
+        return self.ttl > 0 and time.time() - stored_at > self.ttl
+
+    # Carrega as respostas persistidas, das mais antigas para as mais recentes
+    def _load(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    entry = json.load(f)
+                entries.append((entry['stored_at'], name[:-5], entry['result']))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f'Entrada inválida no cache de resultados ({name}): {e}')
+        for stored_at, key, result in sorted(entries, key=lambda entry: entry[0]):
+            if self._expired(stored_at):
+                self._remove_file(key)
+                continue
+            self._data[key] = (result, stored_at)
+        self._evict()
+        logger.info(f'Cache de resultados: {len(self._data)} respostas carregadas de {self.directory}')
+
+    def _remove_file(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while len(self._data) > self.maxsize:
+            key, _ = self._data.popitem(last=False)
+            if self.directory:
+                self._remove_file(key)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or self._expired(item[1]):
+                if item is not None:
+                    del self._data[key]
+                    if self.directory:
+                        self._remove_file(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, result):
+        stored_at = time.time()
+        with self._lock:
+            self._data[key] = (result, stored_at)
+            self._data.move_to_end(key)
+            self._evict()
+        if self.directory:
+            try:
+                with open(self._path(key), 'w') as f:
+                    json.dump({'stored_at': stored_at, 'result': result}, f)
+            except (OSError, TypeError) as e:
+                logger.error(f'Erro ao persistir resultado {key}: {e}')
+
+    def metrics(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'size': len(self._data),
+            'persisted': self.directory is not None,
+        }
+
+
+result_cache = ResultCache()
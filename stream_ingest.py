@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+
+import cv2
+from loguru import logger
+
+# Fontes contínuas: "camera=url" separados por vírgula (MJPEG por HTTP ou RTSP); sem "camera=", a
+# própria URL identifica a câmera. Ex.: STREAM_URLS="portao-1=http://10.24.8.50:81/stream"
+STREAM_URLS = os.environ.get('STREAM_URLS', '')
+# Prefixos de URL aceitos em POST /streams, separados por vírgula (ex.: "http://10.24.8."), além
+# das URLs de STREAM_URLS. Sem eles, apenas as fontes de STREAM_URLS podem ser (re)iniciadas.
+STREAM_ALLOWED_URLS = [prefix.strip() for prefix in os.environ.get('STREAM_ALLOWED_URLS', '').split(',')
+                       if prefix.strip()]
+STREAM_SCHEMES = ('http://', 'https://', 'rtsp://')
+# Quadros por segundo enviados ao OCR por câmera; os demais quadros decodificados são descartados
+STREAM_SAMPLE_FPS = float(os.environ.get('STREAM_SAMPLE_FPS', 2))
+# Espera antes de reabrir uma fonte que caiu ou não abriu
+STREAM_RECONNECT_S = float(os.environ.get('STREAM_RECONNECT_S', 2))
+# Sem quadro novo por esse tempo, a conexão é considerada travada e é reaberta
+STREAM_READ_TIMEOUT_S = float(os.environ.get('STREAM_READ_TIMEOUT_S', 10))
+
+
+def parse_stream_urls(value=STREAM_URLS):
+    """Converte STREAM_URLS em [(camera_id, url)]."""
+    streams = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        camera_id, separator, url = item.partition('=')
+        # Uma URL sem "camera=" pode ter '=' na query; o identificador da câmera nunca contém "://"
+        if not separator or '://' in camera_id:
+            camera_id, url = item, item
+        streams.append((camera_id.strip(), url.strip()))
+    return streams
+
+
+# Fontes que podem ser abertas a pedido de um cliente: nunca arquivos locais ou outros protocolos
+# do FFmpeg, e só as configuradas no servidor
+def stream_source_allowed(url, configured=STREAM_URLS, allowed_prefixes=None):
+    if not url.lower().startswith(STREAM_SCHEMES):
+        return False
+    if url in {source for _, source in parse_stream_urls(configured)}:
+        return True
+    return any(url.startswith(prefix) for prefix in (STREAM_ALLOWED_URLS if allowed_prefixes is None
+                                                     else allowed_prefixes))
+
+
+# Consumidor de uma fonte contínua. Uma thread decodifica todos os quadros (mantendo a conexão em dia)
+# e guarda apenas o mais recente; outra entrega ao pipeline, no máximo `sample_fps` quadros por segundo,
+# sempre o último quadro disponível. Com o OCR mais lento que a câmera, os quadros antigos são descartados.
+class StreamConsumer:
+    def __init__(self, camera_id, url, handler, sample_fps=STREAM_SAMPLE_FPS):
+        self.camera_id = camera_id
+        self.url = url
+        self.handler = handler
+        self.interval = 1.0 / sample_fps if sample_fps > 0 else 0.0
+        self._condition = threading.Condition()
+        self._frame = None
+        self._frame_number = 0
+        self._frame_time = None
+        self._stop = threading.Event()
+        self._threads = []
+        self.connected = False
+        self.reconnects = 0
+        self.decoded = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_status = None
+        self.last_plates = None
+        self.last_latency_ms = None
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._decode_loop, name=f'stream-decode-{self.camera_id}', daemon=True),
+            threading.Thread(target=self._process_loop, name=f'stream-ocr-{self.camera_id}', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _open(self):
+        capture = cv2.VideoCapture(self.url)
+        # Buffer mínimo no decodificador, para que read() não devolva quadros atrasados
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return capture
+
+    def _decode_loop(self):
+        while not self._stop.is_set():
+            capture = self._open()
+            if not capture.isOpened():
+                logger.warning(f'Stream {self.camera_id}: não foi possível abrir {self.url}')
+                capture.release()
+                self._stop.wait(STREAM_RECONNECT_S)
+                self.reconnects += 1
+                continue
+            self.connected = True
+            logger.info(f'Stream {self.camera_id}: conectado a {self.url}')
+            last_frame = time.monotonic()
+            while not self._stop.is_set():
+                ok, frame = capture.read()
+                if not ok or frame is None:
+                    if time.monotonic() - last_frame > STREAM_READ_TIMEOUT_S or not capture.isOpened():
+                        break
+                    self._stop.wait(0.01)
+                    continue
+                last_frame = time.monotonic()
+                with self._condition:
+                    # O quadro anterior que ainda não foi entregue é substituído
+                    if self._frame is not None:
+                        self.dropped += 1
+                    self._frame = frame
+                    self._frame_number += 1
+                    self._frame_time = last_frame
+                    self.decoded += 1
+                    self._condition.notify()
+            capture.release()
+            self.connected = False
+            if not self._stop.is_set():
+                logger.warning(f'Stream {self.camera_id}: conexão perdida, reabrindo em {STREAM_RECONNECT_S}s')
+                self._stop.wait(STREAM_RECONNECT_S)
+                self.reconnects += 1
+
+    def _next_frame(self):
+        with self._condition:
+            while self._frame is None and not self._stop.is_set():
+                self._condition.wait(1.0)
+            frame, captured = self._frame, self._frame_time
+            self._frame = None
+            return frame, self._frame_number, captured
+
+    def _process_loop(self):
+        next_due = time.monotonic()
+        while not self._stop.is_set():
+            # Respeita a taxa de amostragem; enquanto espera, o decodificador continua atualizando o quadro
+            delay = next_due - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                break
+            frame, number, captured = self._next_frame()
+            if frame is None:
+                continue
+            next_due = max(next_due + self.interval, time.monotonic())
+            try:
+                response, status = self.handler(self.camera_id, frame, f'{self.camera_id}_{number:08d}.jpg')
+                self.last_status = response.get('status') or status
+                if isinstance(response.get('plates'), list):
+                    plates = [plate['plate'] for plate in response['plates']]
+                    # Com a sessão decidida, os quadros seguintes repetem a mesma placa
+                    if plates != self.last_plates:
+                        logger.info(f'Stream {self.camera_id}: placas {plates}')
+                    self.last_plates = plates
+            except Exception as e:
+                self.errors += 1
+                logger.exception(f'Stream {self.camera_id}: erro ao processar quadro: {e}')
+            self.processed += 1
+            self.last_latency_ms = (time.monotonic() - captured) * 1000
+
+    def metrics(self):
+        return {
+            'camera_id': self.camera_id,
+            'url': self.url,
+            'connected': self.connected,
+            'sample_fps': 1.0 / self.interval if self.interval else None,
+            'decoded': self.decoded,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'reconnects': self.reconnects,
+            'last_status': self.last_status,
+            'last_plates': self.last_plates,
+            'last_latency_ms': self.last_latency_ms,
+        }
+
+
+# Conjunto de consumidores do processo
+class StreamIngest:
+    def __init__(self, handler):
+        self.handler = handler
+        self._consumers = {}
+        self._lock = threading.Lock()
+
+    def add(self, camera_id, url, sample_fps=STREAM_SAMPLE_FPS):
+        with self._lock:
+            if camera_id in self._consumers:
+                self._consumers.pop(camera_id).stop()
+            consumer = self._consumers[camera_id] = StreamConsumer(camera_id, url, self.handler, sample_fps).start()
+        return consumer
+
+    def remove(self, camera_id):
+        with self._lock:
+            consumer = self._consumers.pop(camera_id, None)
+        if consumer is not None:
+            consumer.stop()
+        return consumer is not None
+
+    def start_configured(self, value=STREAM_URLS):
+        for camera_id, url in parse_stream_urls(value):
+            self.add(camera_id, url)
+
+    def close(self):
+        with self._lock:
+            consumers, self._consumers = list(self._consumers.values()), {}
+        for consumer in consumers:
+            consumer.stop()
+
+    def metrics(self):
+        with self._lock:
+            consumers = list(self._consumers.values())
+        return {'streams': [consumer.metrics() for consumer in consumers]}
@@ -0,0 +1,92 @@
+import json
+import os
+import random
+import string
+
+import cv2
+import numpy as np
+
+from plate_decoder import PLATE_FORMATS
+
+# Variações aplicadas às placas sintéticas (combinadas de forma determinística pela semente)
+SYNTHETIC_SCALES = (1.0, 0.6, 0.35)
+SYNTHETIC_BLURS = (0, 3, 7)
+SYNTHETIC_ANGLES = (0, -6, 6, -12, 12)
+SYNTHETIC_FRAME_SIZE = (640, 480)
+
+
+def random_plate(rng, plate_format):
+    pattern = PLATE_FORMATS[plate_format]
+    return ''.join(rng.choice(string.ascii_uppercase) if cls == 'L' else rng.choice(string.digits)
+                   for cls in pattern)
+
+
+# Desenha a placa em tamanho canônico (400x130): Mercosul com faixa azul, antiga cinza com hífen
+def render_plate(text, plate_format):
+    if plate_format == 'mercosul':
+        plate = np.full((130, 400, 3), 255, np.uint8)
+        cv2.rectangle(plate, (0, 0), (399, 30), (180, 60, 0), -1)
+        cv2.putText(plate, 'BRASIL', (165, 23), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2, cv2.LINE_AA)
+        shown = text
+    else:
+        plate = np.full((130, 400, 3), 190, np.uint8)
+        shown = f'{text[:3]}-{text[3:]}'
+    cv2.rectangle(plate, (0, 0), (399, 129), (0, 0, 0), 3)
+    (width, height), _ = cv2.getTextSize(shown, cv2.FONT_HERSHEY_SIMPLEX, 2.4, 7)
+    origin = ((400 - width) // 2, 118 - (88 - height) // 2)
+    cv2.putText(plate, shown, origin, cv2.FONT_HERSHEY_SIMPLEX, 2.4, (0, 0, 0), 7, cv2.LINE_AA)
+    return plate
+
+
+# Coloca a placa, escalada e girada, sobre um fundo com textura e aplica desfoque. Com `with_box`,
+# retorna também o retângulo (x1, y1, x2, y2) ocupado pela placa, para medir a localização
+def compose_frame(plate, rng, scale, angle, blur, size=SYNTHETIC_FRAME_SIZE, with_box=False):
+    width, height = size
+    frame = np.empty((height, width, 3), np.uint8)
+    frame[...] = [rng.randint(30, 200) for _ in range(3)]
+    noise = np.random.default_rng(rng.randint(0, 2 ** 31)).integers(0, 40, frame.shape, dtype=np.uint8)
+    frame = cv2.add(frame, noise)
+
+    plate_width = int(width * 0.55 * scale)
+    plate = cv2.resize(plate, (plate_width, int(plate_width * 130 / 400)), interpolation=cv2.INTER_AREA)
+    h, w = plate.shape[:2]
+    x = rng.randint(0, width - w)
+    y = rng.randint(height // 3, height - h)
+
+    # Rotação em torno do centro da placa, copiando apenas os pixels da placa para o quadro
+    mask = np.full((h, w), 255, np.uint8)
+    canvas = np.zeros_like(frame)
+    canvas_mask = np.zeros((height, width), np.uint8)
+    canvas[y:y + h, x:x + w] = plate
+    canvas_mask[y:y + h, x:x + w] = mask
+    rotation = cv2.getRotationMatrix2D((x + w / 2, y + h / 2), angle, 1.0)
+    canvas = cv2.warpAffine(canvas, rotation, (width, height))
+    canvas_mask = cv2.warpAffine(canvas_mask, rotation, (width, height))
+    frame[canvas_mask > 127] = canvas[canvas_mask > 127]
+
+    if blur:
+        frame = cv2.GaussianBlur(frame, (blur, blur), 0)
+    if with_box:
+        bx, by, bw, bh = cv2.boundingRect(cv2.findNonZero((canvas_mask > 127).astype(np.uint8)))
+        return frame, (bx, by, bx + bw, by + bh)
+    return frame
+
+
+# Gera o corpus sintético em `folder` e retorna {arquivo: placa}; também grava labels.json
+def generate_corpus(folder, count, seed=0):
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    labels = {}
+    for i in range(count):
+        plate_format = 'mercosul' if i % 2 == 0 else 'legacy'
+        text = random_plate(rng, plate_format)
+        scale = SYNTHETIC_SCALES[i % len(SYNTHETIC_SCALES)]
+        blur = SYNTHETIC_BLURS[(i // len(SYNTHETIC_SCALES)) % len(SYNTHETIC_BLURS)]
+        angle = SYNTHETIC_ANGLES[i % len(SYNTHETIC_ANGLES)]
+        frame = compose_frame(render_plate(text, plate_format), rng, scale, angle, blur)
+        name = f'synthetic_{i:04d}_{plate_format}_s{scale}_b{blur}_a{angle}.jpg'
+        cv2.imwrite(os.path.join(folder, name), frame)
+        labels[name] = text
+    with open(os.path.join(folder, 'labels.json'), 'w') as f:
+        json.dump(labels, f, indent=2)
+    return labels
@@ -3,8 +3,11 @@ import os
 from werkzeug.utils import secure_filename
 from loguru import logger
 import cv2
-import requests
 import easyocr
+from ocr_pool import get_reader_pool
+from ocr_profiles import get_profile, readtext_kwargs
+from plate_verification import get_verification_client
+from ocr_decoders import DECODERS, recognize_with_decoders, fuse_decoder_results
 import re
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
@@ -47,21 +50,27 @@ def draw_boxes(image_path, results):
 
 # Função para realizar OCR e filtragem de texto da placa
 class PlateDataAnalysis:
-    def __init__(self):
-        self.reader = easyocr.Reader(['pt'])
-
-    def read_text_from_image(self, image_path):
-        # Realizando OCR 3 vezes com diferentes decodificadores
+    def __init__(self, reader=None):
+        # Usa um leitor do pool quando fornecido; senão carrega um novo
+        self.reader = reader if reader is not None else easyocr.Reader(get_profile()['languages'])
+
+    def read_text_from_image(self, image_path, decoders=DECODERS, single_detection=True):
+        if single_detection:
+            # Detecta o texto uma vez e executa só o reconhecimento para cada decodificador,
+            # combinando os resultados por votação em cada caixa
+            results_by_decoder = recognize_with_decoders(self.reader, image_path, decoders)
+            results = fuse_decoder_results(results_by_decoder)
+            logger.info(f'OCR results (fused from {len(decoders)} decoders): {results}')
+            return results
+
+        # Realizando OCR completo com cada decodificador
         results = []
-        decoders = ['beamsearch', 'wordbeamsearch', 'greedy']
-
-        # Realiza o OCR 3 vezes com diferentes parâmetros
         for decoder in decoders:
             logger.info(f"Realizando OCR com o decodificador {decoder}...")
-            result = self.reader.readtext(image_path, decoder=decoder)
+            result = self.reader.readtext(image_path, decoder=decoder, **readtext_kwargs())
             results.extend(result)  # Adiciona os resultados da execução ao total
 
-        logger.info(f'OCR results (combined from 3 analyses): {results}')
+        logger.info(f'OCR results (combined from {len(decoders)} analyses): {results}')
         return results
 
     def filter_plates(self, results):
@@ -83,14 +92,11 @@ class PlateDataAnalysis:
 
 # Função para verificar a placa no Adonis js
 def check_plate_in_database(plate):
-    try:
-        response = requests.get(f'http://localhost:3555/search-plate?plate={plate}')
-        data = response.json()
-        logger.info(f'Entrou na verificação de placas')
-        return data.get('message') == 'Placa cadastrada'
-    except requests.RequestException as e:
-        logger.error(f'Erro ao verificar placa: {e}')
-        return False
+    return get_verification_client().check(plate)
+
+# Verifica em paralelo todas as placas candidatas (com cache e conexões reaproveitadas)
+def check_plates_in_database(plates):
+    return get_verification_client().verify_many(plates)
 
 @app.route('/upload', methods=['POST'])
 def upload_image():
@@ -108,20 +114,24 @@ def upload_image():
         file.save(file_path)
         logger.info(f'Image saved at {file_path}')
 
-        # Processar a imagem e realiza OCR
-        plate_analysis = PlateDataAnalysis()
-        texts = plate_analysis.read_text_from_image(file_path)  # Executa o OCR 3 vezes
-        text_plate = plate_analysis.filter_plates(texts)
+        # Processar a imagem e realiza OCR com um leitor do pool
+        with get_reader_pool(languages=['pt']).reader() as reader:
+            plate_analysis = PlateDataAnalysis(reader)
+            texts = plate_analysis.read_text_from_image(file_path)  # Detecção única + 3 decodificadores
+            text_plate = plate_analysis.filter_plates(texts)
 
         # Verificar se as placas estão cadastradas na API
         plate_verifications = []
         if text_plate:
+            verification_results = check_plates_in_database([plate['text'] for plate in text_plate])
             for plate in text_plate:
-                verification_result = check_plate_in_database(plate['text'])
+                result = verification_results[plate['text']]
                 plate_verifications.append({
                     'plate': plate['text'],
                     'confidence': plate['confidence'],
-                    'verification': verification_result
+                    'verification': result['verification'],
+                    'match': result['match'],
+                    'distance': result['distance']
                 })
 
         # Desenhar caixas nas letras detectadas
@@ -140,6 +150,11 @@ def upload_image():
 
     return jsonify({'error': 'File type not allowed'}), 400
 
+# Rota com as métricas do pool de leitores OCR
+@app.route('/ocr-pool')
+def ocr_pool_metrics():
+    return jsonify(get_reader_pool(languages=['pt']).metrics()), 200
+
 # Rota para servir arquivos de imagem carregados
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
@@ -155,4 +170,9 @@ if __name__ == '__main__':
         os.makedirs(UPLOAD_FOLDER)
     if not os.path.exists('./outputs'):
         os.makedirs('./outputs')
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Carrega e aquece os leitores OCR antes de aceitar requisições
+    get_reader_pool(languages=['pt'])
+    # Carrega o índice local de placas (quando PLATE_INDEX_URL estiver configurado)
+    get_verification_client()
+    # Sem o recarregador do modo debug, que executaria este bloco de novo e carregaria um segundo pool
+    app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=False)
@@ -0,0 +1,71 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip('easyocr')
+import vTratamento  # noqa: E402
+
+IMAGES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'imagens')
+
+
+# Quadros de um veículo passando: a mesma cena deslocada alguns pixels a cada quadro
+def burst(count, name='palio.jpg', shift=40):
+    image = cv2.imread(os.path.join(IMAGES, name))
+    frames = []
+    for i in range(count):
+        moved = np.roll(image, i * shift, axis=1)
+        frames.append(cv2.imencode('.jpg', moved)[1].tobytes())
+    return frames
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    """Pipeline de upload com OCR e verificação simulados; conta os quadros que passaram pelo OCR."""
+    calls = []
+
+    def ocr_frame(image, debug=None):
+        calls.append(image.shape)
+        box = [[10, 10], [110, 10], [110, 40], [10, 40]]
+        return [(box, 'ABC1D23', 0.6)], [{'text': 'ABC1D23', 'confidence': 0.6, 'format': 'mercosul'}], 'quadrilateral'
+
+    def check_plates_in_database(plates):
+        return {plate: {'verification': True, 'match': plate, 'distance': 0} for plate in plates}
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'uploads').mkdir()
+    monkeypatch.setattr(vTratamento, 'ocr_frame', ocr_frame)
+    monkeypatch.setattr(vTratamento, 'check_plates_in_database', check_plates_in_database)
+    monkeypatch.setattr(vTratamento, 'OCR_WORKERS', 0)
+    monkeypatch.setattr(vTratamento, 'PRESENCE_ENABLED', False)
+    monkeypatch.setattr(vTratamento, 'RESULT_CACHE_ENABLED', False)
+    return calls
+
+
+def post(frame, camera_id):
+    with vTratamento.app.test_request_context():
+        return vTratamento.process_upload(frame, 'frame.jpg', camera_id)
+
+
+def test_decided_burst_skips_ocr(pipeline):
+    responses = [post(frame, 'burst-cam')[0] for frame in burst(8)]
+
+    # Três leituras de 0.6 passam de SESSION_CONFIDENCE; os quadros seguintes não passam pelo OCR
+    assert len(pipeline) == 3
+    assert all(not response.get('duplicate_frame') for response in responses)
+    session_ids = {response['session']['id'] for response in responses}
+    assert len(session_ids) == 1
+    assert responses[-1]['session']['skipped'] and responses[-1]['session']['skipped_frames'] == 5
+    assert responses[-1]['plates'][0]['plate'] == 'ABC1D23'
+
+
+def test_scene_change_starts_new_session(pipeline):
+    first = [post(frame, 'scene-cam')[0] for frame in burst(5)]
+    # Outro veículo diante da câmera sem quadro vazio entre os dois
+    response = post(burst(1, 'placa-mercosul.jpg')[0], 'scene-cam')[0]
+
+    assert first[-1]['session']['skipped']
+    assert len(pipeline) == 4
+    assert response['session']['id'] != first[-1]['session']['id']
+    assert not response['session']['skipped']
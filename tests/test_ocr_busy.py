@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+pytest.importorskip('easyocr')
+import vTratamento  # noqa: E402
+from ocr_pool import ReaderPool  # noqa: E402
+from ocr_workers import OCRBusy  # noqa: E402
+
+IMAGES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'imagens')
+
+
+def test_checkout_timeout_raises_busy():
+    pool = ReaderPool(size=1, warmup=False)
+    reader = pool.checkout()
+    with pytest.raises(OCRBusy):
+        pool.checkout(timeout=0.01)
+    pool.checkin(reader)
+    pool.checkin(pool.checkout(timeout=0.01))
+
+
+def test_busy_upload_returns_503(monkeypatch, tmp_path):
+    def ocr_frame(image, debug=None):
+        raise OCRBusy('Nenhum leitor OCR livre em 30s')
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'uploads').mkdir()
+    monkeypatch.setattr(vTratamento, 'ocr_frame', ocr_frame)
+    monkeypatch.setattr(vTratamento, 'OCR_WORKERS', 0)
+    monkeypatch.setattr(vTratamento, 'PRESENCE_ENABLED', False)
+    monkeypatch.setattr(vTratamento, 'RESULT_CACHE_ENABLED', False)
+    client = vTratamento.app.test_client()
+    with open(os.path.join(IMAGES, 'palio.jpg'), 'rb') as image:
+        response = client.post('/upload', data={'image': (image, 'palio.jpg')})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert 'error' in response.get_json()
+
+
+def test_busy_job_reports_503(monkeypatch):
+    def process_upload(**payload):
+        raise OCRBusy('Nenhum processo de OCR livre em 60s')
+
+    monkeypatch.setattr(vTratamento, 'process_upload', process_upload)
+    response, status = vTratamento.run_job({'data': b'', 'filename': 'a.jpg', 'base_url': 'http://localhost/'})
+
+    assert status == 503
+    assert 'timings' in response
@@ -0,0 +1,98 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from plate_index import PlateIndex
+
+
+# API de cadastro simulada: carga completa sem `since`, alterações com `since`
+class RegistryStub:
+    def __init__(self):
+        self.full = {'plates': ['ABC1D23', {'plate': 'XYZ-9876'}], 'cursor': 1}
+        self.deltas = {}
+        self.requests = []
+        self.online = True
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                since = parse_qs(urlparse(self.path).query).get('since', [None])[0]
+                stub.requests.append(since)
+                if not stub.online:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps(stub.deltas[since] if since is not None else stub.full).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/plates'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def registry():
+    stub = RegistryStub()
+    yield stub
+    stub.close()
+
+
+def make_index(registry, tmp_path):
+    return PlateIndex(url=registry.url, snapshot_path=str(tmp_path / 'plate_index.json'), timeout=2)
+
+
+def test_full_load(registry, tmp_path):
+    index = make_index(registry, tmp_path)
+    assert index.load()
+    assert len(index) == 2
+    assert 'ABC1D23' in index and 'XYZ9876' in index and 'abc-1d23' in index
+    assert 'AAA0A00' not in index
+    assert registry.requests == [None]
+    assert json.loads((tmp_path / 'plate_index.json').read_text()) == {'plates': ['ABC1D23', 'XYZ9876'], 'cursor': 1}
+
+
+def test_delta_apply(registry, tmp_path):
+    index = make_index(registry, tmp_path)
+    index.load()
+    registry.deltas['1'] = {'added': ['NEW1A11'], 'removed': ['ABC1D23'], 'cursor': 2}
+    assert index.sync()
+    assert registry.requests == [None, '1']
+    assert 'NEW1A11' in index and 'XYZ9876' in index and 'ABC1D23' not in index
+    assert index.match('NEW1A11') == ('NEW1A11', 0)
+    assert json.loads((tmp_path / 'plate_index.json').read_text())['cursor'] == 2
+
+
+def test_offline_snapshot_reload(registry, tmp_path):
+    make_index(registry, tmp_path).load()
+    registry.online = False
+
+    index = make_index(registry, tmp_path)
+    assert index.load()
+    assert index.sync_errors == 1
+    assert 'ABC1D23' in index and len(index) == 2
+    # O cursor do arquivo local é usado na próxima sincronização
+    registry.online = True
+    registry.deltas['1'] = {'added': ['NEW1A11'], 'cursor': 2}
+    assert index.sync()
+    assert registry.requests[-1] == '1' and 'NEW1A11' in index
+
+
+def test_offline_without_snapshot(registry, tmp_path):
+    registry.online = False
+    index = make_index(registry, tmp_path)
+    assert not index.load()
+    assert not index.ready and 'ABC1D23' not in index
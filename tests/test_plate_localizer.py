@@ -0,0 +1,50 @@
+import os
+import random
+
+import cv2
+import numpy as np
+
+from plate_localizer import find_plate_min_area_rect, locate_plate
+from synthetic_plates import compose_frame, render_plate
+
+IMAGES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'imagens')
+
+
+def box_of(location):
+    x, y, w, h = cv2.boundingRect(location)
+    return x, y, x + w, y + h
+
+
+def test_palio_does_not_locate_the_badge():
+    gray = cv2.imread(os.path.join(IMAGES, 'palio.jpg'), cv2.IMREAD_GRAYSCALE)
+    location, tier = locate_plate(gray)
+    assert tier != 'full_frame'
+    # O emblema e a grade ficam no topo da imagem; a placa, abaixo da metade
+    x1, y1, x2, y2 = box_of(location)
+    assert y1 > 400 and x1 <= 877 <= x2 and y1 <= 870 <= y2
+
+
+def test_min_area_rect_prefers_text_over_larger_box():
+    gray = np.full((480, 640), 120, np.uint8)
+    cv2.rectangle(gray, (20, 20), (620, 200), 40, 3)
+    plate = cv2.cvtColor(render_plate('ABC1D23', 'mercosul'), cv2.COLOR_BGR2GRAY)
+    plate = cv2.resize(plate, (200, 65))
+    gray[320:385, 220:420] = plate
+    x1, y1, x2, y2 = box_of(find_plate_min_area_rect(gray, 1.0))
+    assert y1 >= 300 and x1 >= 200 and x2 <= 440
+
+
+def test_small_blob_is_not_a_quadrilateral():
+    gray = np.full((480, 640), 200, np.uint8)
+    cv2.rectangle(gray, (300, 300), (326, 315), 0, -1)
+    location, tier = locate_plate(gray)
+    assert tier != 'quadrilateral'
+
+
+def test_synthetic_plate_is_located():
+    frame, (px1, py1, px2, py2) = compose_frame(render_plate('ABC1234', 'legacy'), random.Random(3), 0.6, 0, 0,
+                                               with_box=True)
+    location, tier = locate_plate(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    x1, y1, x2, y2 = box_of(location)
+    assert tier in ('quadrilateral', 'min_area_rect')
+    assert x1 <= px1 + 5 and x2 >= px2 - 5 and y1 <= (py1 + py2) / 2 <= y2
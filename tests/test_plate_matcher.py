@@ -0,0 +1,48 @@
+from plate_matcher import PlateMatcher, format_confusion_only
+from plate_verification import PlateVerificationClient
+
+
+# Índice local já carregado, sem API de cadastro
+class LocalIndex:
+    ready = True
+
+    def __init__(self, plates):
+        self.matcher = PlateMatcher(plates)
+
+    def match(self, plate):
+        return self.matcher.match(plate)
+
+
+def verify(registered, plate):
+    return PlateVerificationClient(url='http://127.0.0.1:9/unused', index=LocalIndex(registered)).verify(plate)
+
+
+def test_match_nearest():
+    matcher = PlateMatcher(['ABC1E23', 'XYZ9876'])
+    assert matcher.match('abc-1e23') == ('ABC1E23', 0)
+    assert matcher.match('ABC1F23') == ('ABC1E23', 1)
+    assert matcher.match('XYZ98760') == ('XYZ9876', 1)
+    assert matcher.match('QQQ0Q00') == (None, None)
+
+
+def test_format_confusion_only():
+    assert format_confusion_only('ABC1G23', 'ABC1623')
+    assert format_confusion_only('ABC1823', 'ABC1B23')
+    # Troca letra/letra: as duas leituras são placas válidas
+    assert not format_confusion_only('ABC1F23', 'ABC1E23')
+    # Troca letra/número fora da posição que separa os formatos
+    assert not format_confusion_only('ABC1G26', 'ABC1G2G')
+    assert not format_confusion_only('ABC1G24', 'ABC1623')
+    assert not format_confusion_only('ABC1X23', 'ABC1623')
+
+
+def test_neighbour_plate_is_not_verified():
+    result = verify(['ABC1E23'], 'ABC1F23')
+    assert result == {'verification': False, 'match': 'ABC1E23', 'distance': 1}
+    for read in ('ABC1E28', 'ABD1E23', 'CBC1E23'):
+        assert not verify(['ABC1E23'], read)['verification']
+
+
+def test_format_position_swap_is_verified():
+    assert verify(['ABC1623'], 'ABC1G23') == {'verification': True, 'match': 'ABC1623', 'distance': 1}
+    assert verify(['ABC1E23'], 'ABC1E23') == {'verification': True, 'match': 'ABC1E23', 'distance': 0}
@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from loguru import logger
+
+# Salvar o upload original em disco é opcional e feito em segundo plano
+SAVE_UPLOADS = os.environ.get('SAVE_UPLOADS', '1') == '1'
+
+_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix='upload-writer')
+
+
+# Decodifica os bytes enviados diretamente para um array NumPy (BGR)
+def decode_image_bytes(data):
+    buffer = np.frombuffer(data, np.uint8)
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if image is None:
+        logger.error('Erro ao decodificar a imagem enviada')
+    return image
+
+
+# Carrega a imagem a partir de um caminho ou reaproveita o array já decodificado
+def load_image(image):
+    if isinstance(image, np.ndarray):
+        return image
+    return cv2.imread(image)
+
+
+def _write_bytes(data, path):
+    try:
+        with open(path, 'wb') as f:
+            f.write(data)
+        logger.info(f'Image saved at {path}')
+    except OSError as e:
+        logger.error(f'Erro ao salvar upload em {path}: {e}')
+
+
+# Agenda a gravação dos bytes originais sem bloquear a requisição
+def save_upload_async(data, path):
+    if not SAVE_UPLOADS:
+        return None
+    return _writer.submit(_write_bytes, data, path)
@@ -3,12 +3,14 @@ import os
 from werkzeug.utils import secure_filename
 from loguru import logger
 import cv2
-import requests
 import easyocr
+from ocr_pool import get_reader_pool
+from ocr_profiles import get_profile, readtext_kwargs
+from plate_verification import get_verification_client
+from pipeline_debug import NO_DEBUG, StageDebugger
+from ocr_decoders import DECODERS, recognize_with_decoders, fuse_decoder_results
+from plate_localizer import LOCALIZER_SCALE, crop_plate, locate_plate
 import re
-import numpy as np
-import imutils
-import matplotlib.pyplot as plt
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 UPLOAD_FOLDER = './uploads'
@@ -52,97 +54,58 @@ def draw_boxes(image_path, results):
 
 # Função para realizar OCR e filtragem de texto da placa
 class PlateDataAnalysis:
-    def __init__(self):
-        self.reader = easyocr.Reader(['pt', 'en'])
+    def __init__(self, reader=None):
+        # Usa um leitor do pool quando fornecido; senão carrega um novo
+        self.reader = reader if reader is not None else easyocr.Reader(get_profile()['languages'])
 
-    def process_image(self, image_path):
+    def process_image(self, image_path, debug=NO_DEBUG):
         # Carregar a imagem
         img = cv2.imread(image_path)
 
         # Convertendo para escala de cinza
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        cv2.imwrite('./outputs/gray_image.jpg', gray)  # Salva a imagem em escala de cinza
-        plt.imshow(gray, cmap='gray')
-        plt.title("Imagem em Escala de Cinza")
-        plt.show()
-
-        # Aplicando filtro bilateral
-        bfilter = cv2.bilateralFilter(gray, 11, 11, 17)
-        cv2.imwrite('./outputs/bilateral_filtered_image.jpg', bfilter)  # Salva a imagem filtrada
-        plt.imshow(bfilter, cmap='gray')
-        plt.title("Imagem com Filtro Bilateral")
-        plt.show()
-
-        # Detecção de bordas com Canny
-        edged = cv2.Canny(bfilter, 30, 200)
-        cv2.imwrite('./outputs/edged_image.jpg', edged)  # Salva a imagem com bordas detectadas
-        plt.imshow(edged, cmap='gray')
-        plt.title("Imagem com Bordas Detectadas")
-        plt.show()
-
-        # Encontrar contornos
-        contours, _ = cv2.findContours(edged.copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-        plt.imshow(edged, cmap='gray')
-        plt.title("Imagem com Contornos")
-        plt.show()
-
-        # Ordenar os contornos e pegar os 10 maiores
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)[:10]
-
-        location = None
-        for contour in contours:
-            approx = cv2.approxPolyDP(contour, 10, True)
-            if len(approx) == 4:
-                location = approx
-                break
-
-        # Criar a máscara
-        mask = np.zeros(gray.shape, np.uint8)
-        cv2.drawContours(mask, [location], 0, 255, -1)
-
-        # Exibir e salvar a máscara
-        cv2.imwrite('./outputs/masked_image.jpg', mask)  # Salva a imagem com a máscara aplicada
-        plt.imshow(mask, cmap='gray')
-        plt.title("Imagem com Máscara Aplicada")
-        plt.show()
-
-        # Isolar a placa usando a máscara
-        new_image = cv2.bitwise_and(img, img, mask=mask)
-
-        # Exibir e salvar a imagem com a placa isolada
-        cv2.imwrite('./outputs/masked_image_final.jpg', new_image)  # Salva a imagem com máscara aplicada
-        plt.imshow(new_image)
-        plt.title("Imagem com Placa Isolada")
-        plt.show()
-
-        # Coordenadas do retângulo
-        (x, y) = np.where(mask == 255)
-        (x1, y1) = (np.min(x), np.min(y))
-        (x2, y2) = (np.max(x), np.max(y))
-
-        # Adicionando um buffer
-        cropped_image = gray[x1:x2 + 3, y1:y2 + 3]
-        cv2.imwrite('./outputs/cropped_image.jpg', cropped_image)  # Salva a imagem recortada
-        plt.imshow(cropped_image, cmap='gray')
-        plt.title("Imagem Recortada")
-        plt.show()
+        debug.capture('gray_image', gray, "Imagem em Escala de Cinza")
+
+        # Localizar a placa em níveis (quadrilátero, retângulo rotacionado, região da busca
+        # reduzida); sem localização, o OCR roda na imagem inteira
+        location, tier = locate_plate(gray, LOCALIZER_SCALE, debug)
+        logger.info(f'Placa localizada pelo nível {tier}')
+        if location is None:
+            debug.capture('cropped_image', gray, "Imagem Inteira")
+            return gray
+
+        # Contorno encontrado (desenhado apenas na depuração)
+        if debug.enabled:
+            located = img.copy()
+            cv2.drawContours(located, [location], 0, (0, 255, 0), 3)
+            debug.capture('location_image', located, "Placa Localizada")
+
+        # Recorte pelo retângulo envolvente do contorno, com buffer
+        cropped_image = crop_plate(gray, location)
+        debug.capture('cropped_image', cropped_image, "Imagem Recortada")
 
         return cropped_image
 
-    def read_text_from_image(self, image_path):
+    def read_text_from_image(self, image_path, decoders=DECODERS, single_detection=True, debug=NO_DEBUG):
         # Realiza o pré-processamento da imagem (recorte da placa)
-        cropped_image = self.process_image(image_path)
+        cropped_image = self.process_image(image_path, debug)
 
-        # Realizando OCR
-        results = []
-        decoders = ['beamsearch', 'wordbeamsearch', 'greedy']
+        if single_detection:
+            # Detecta o texto uma vez e executa só o reconhecimento para cada decodificador,
+            # combinando os resultados por votação em cada caixa
+            results_by_decoder = recognize_with_decoders(self.reader, cropped_image, decoders)
+            results = fuse_decoder_results(results_by_decoder)
+            logger.info(f'OCR results (fused from {len(decoders)} decoders): {results}')
+            return results
 
+        # Realizando OCR completo com cada decodificador
+        results = []
         for decoder in decoders:
             logger.info(f"Realizando OCR com o decodificador {decoder}...")
-            result = self.reader.readtext(cropped_image, decoder=decoder)
+            result = self.reader.readtext(cropped_image, decoder=decoder, **readtext_kwargs())
             results.extend(result)  # Adiciona os resultados da execução ao total
 
-        logger.info(f'OCR results (combined from 3 analyses): {results}')
+        logger.info(f'OCR results (combined from {len(decoders)} analyses): {results}')
         return results
 
     def filter_plates(self, results):
@@ -164,14 +127,11 @@ class PlateDataAnalysis:
 
 # Função para verificar a placa no Adonis js
 def check_plate_in_database(plate):
-    try:
-        response = requests.get(f'http://localhost:3555/search-plate?plate={plate}')
-        data = response.json()
-        logger.info(f'Entrou na verificação de placas')
-        return data.get('message') == 'Placa cadastrada'
-    except requests.RequestException as e:
-        logger.error(f'Erro ao verificar placa: {e}')
-        return False
+    return get_verification_client().check(plate)
+
+# Verifica em paralelo todas as placas candidatas (com cache e conexões reaproveitadas)
+def check_plates_in_database(plates):
+    return get_verification_client().verify_many(plates)
 
 @app.route('/upload', methods=['POST'])
 def upload_image():
@@ -189,20 +149,27 @@ def upload_image():
         file.save(file_path)
         logger.info(f'Image saved at {file_path}')
 
-        # Processar a imagem e realiza OCR
-        plate_analysis = PlateDataAnalysis()
-        texts = plate_analysis.read_text_from_image(file_path)  # Executa o OCR 3 vezes
-        text_plate = plate_analysis.filter_plates(texts)
+        # Depuração das etapas apenas quando pedida (?debug=1) ou amostrada
+        debug = StageDebugger.for_request(request.args.get('debug') == '1')
+
+        # Processar a imagem e realiza OCR com um leitor do pool
+        with get_reader_pool().reader() as reader:
+            plate_analysis = PlateDataAnalysis(reader)
+            texts = plate_analysis.read_text_from_image(file_path, debug=debug)  # Detecção única + 3 decodificadores
+            text_plate = plate_analysis.filter_plates(texts)
 
         # Verificar se as placas estão cadastradas na API
         plate_verifications = []
         if text_plate:
+            verification_results = check_plates_in_database([plate['text'] for plate in text_plate])
             for plate in text_plate:
-                verification_result = check_plate_in_database(plate['text'])
+                result = verification_results[plate['text']]
                 plate_verifications.append({
                     'plate': plate['text'],
                     'confidence': plate['confidence'],
-                    'verification': verification_result
+                    'verification': result['verification'],
+                    'match': result['match'],
+                    'distance': result['distance']
                 })
 
         # Desenhar caixas nas letras detectadas
@@ -216,11 +183,18 @@ def upload_image():
             'detected_texts': [{'text': item[1], 'confidence': item[2]} for item in texts],
             'plates': plate_verifications if plate_verifications else 'No potential plates found'
         }
+        if debug.enabled:
+            response['debug'] = debug.summary()
 
         return jsonify(response), 200
 
     return jsonify({'error': 'File type not allowed'}), 400
 
+# Rota com as métricas do pool de leitores OCR
+@app.route('/ocr-pool')
+def ocr_pool_metrics():
+    return jsonify(get_reader_pool().metrics()), 200
+
 # Rota para servir arquivos de imagem carregados
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
@@ -236,4 +210,9 @@ if __name__ == '__main__':
         os.makedirs(UPLOAD_FOLDER)
     if not os.path.exists('./outputs'):
         os.makedirs('./outputs')
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Carrega e aquece os leitores OCR antes de aceitar requisições
+    get_reader_pool()
+    # Carrega o índice local de placas (quando PLATE_INDEX_URL estiver configurado)
+    get_verification_client()
+    # Sem o recarregador do modo debug, que executaria este bloco de novo e carregaria um segundo pool
+    app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=False)
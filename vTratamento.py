@@ -1,14 +1,22 @@
-from flask import Flask, jsonify, request, url_for, send_from_directory
+from flask import Flask, Response, jsonify, request, url_for, send_from_directory
 import os
 from werkzeug.utils import secure_filename
 from loguru import logger
 import cv2
-import requests
-import easyocr
-import re
-import numpy as np
-import imutils
-import matplotlib.pyplot as plt
+from ocr_pool import get_reader_pool
+from camera_sessions import session_tracker
+from frame_dedup import DEDUP_ENABLED, dhash, frame_deduplicator
+from presence import PRESENCE_ENABLED, presence_gate
+from jobs import JobQueue, callback_allowed
+from result_cache import RESULT_CACHE_ENABLED, content_key, result_cache
+from plate_verification import get_verification_client
+from pipeline_debug import NO_DEBUG, StageDebugger
+from pipeline_metrics import render_metrics, stage, track_request
+# PlateDataAnalysis continua exportado por este módulo (bench.py compara as variantes por ele)
+from plate_analysis import PlateDataAnalysis, ocr_frame
+from upload_io import decode_image_bytes, load_image, save_upload_async
+from ocr_workers import OCR_BUSY_RETRY_AFTER_S, OCR_WORKERS, OCRBusy, get_ocr_workers
+from stream_ingest import STREAM_SAMPLE_FPS, StreamIngest, stream_source_allowed
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 UPLOAD_FOLDER = './uploads'
@@ -21,12 +29,16 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 # Função para desenhar as caixas delimitadoras na imagem
-def draw_boxes(image_path, results):
-    image = cv2.imread(image_path)
+def draw_boxes(image, results, filename=None):
+    # Aceita o array já decodificado (desenha sobre uma cópia) ou um caminho
+    if filename is None:
+        filename = os.path.basename(image)
+    image = load_image(image)
 
     if image is None:
-        logger.error(f'Erro ao carregar a imagem: {image_path}')
+        logger.error(f'Erro ao carregar a imagem: {filename}')
         return None
+    image = image.copy()
 
     for result in results:
         try:
@@ -46,173 +58,385 @@ def draw_boxes(image_path, results):
         os.makedirs(output_folder)
 
     # Define o caminho de saída para a imagem
-    output_path = os.path.join(output_folder, os.path.basename(image_path))
+    output_path = os.path.join(output_folder, filename)
     cv2.imwrite(output_path, image)
     return output_path
 
-# Função para realizar OCR e filtragem de texto da placa
-class PlateDataAnalysis:
-    def __init__(self):
-        self.reader = easyocr.Reader(['pt', 'en'])
-
-    def process_image(self, image_path):
-        # Carregar a imagem
-        img = cv2.imread(image_path)
-
-        # Convertendo para escala de cinza
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        cv2.imwrite('./outputs/gray_image.jpg', gray)  # Salva a imagem em escala de cinza
-        plt.imshow(gray, cmap='gray')
-        plt.title("Imagem em Escala de Cinza")
-        plt.show()
-
-        # Aplicando filtro bilateral
-        bfilter = cv2.bilateralFilter(gray, 11, 11, 17)
-        cv2.imwrite('./outputs/bilateral_filtered_image.jpg', bfilter)  # Salva a imagem filtrada
-        plt.imshow(bfilter, cmap='gray')
-        plt.title("Imagem com Filtro Bilateral")
-        plt.show()
-
-        # Detecção de bordas com Canny
-        edged = cv2.Canny(bfilter, 30, 200)
-        cv2.imwrite('./outputs/edged_image.jpg', edged)  # Salva a imagem com bordas detectadas
-        plt.imshow(edged, cmap='gray')
-        plt.title("Imagem com Bordas Detectadas")
-        plt.show()
-
-        # Encontrar contornos
-        keypoints = cv2.findContours(edged.copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-        contours = imutils.grab_contours(keypoints)
-        plt.title("Imagem com Contornos")
-        plt.show()
-
-        # Ordenar os contornos e pegar os 10 maiores
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)[:10]
-
-        location = None
-        for contour in contours:
-            approx = cv2.approxPolyDP(contour, 10, True)
-            if len(approx) == 4:
-                location = approx
-                break
-
-        # Criar a máscara
-        mask = np.zeros(gray.shape, np.uint8)
-        cv2.drawContours(mask, [location], 0, 255, -1)
-        cv2.imwrite('./outputs/masked_image.jpg', mask)  # Salva a imagem com a máscara aplicada
-        plt.imshow(mask, cmap='gray')
-        plt.title("Imagem com Máscara Aplicada")
-        plt.show()
-
-        # Isolar a placa usando a máscara
-        new_image = cv2.bitwise_and(img, img, mask=mask)
-        cv2.imwrite('./outputs/masked_image_final.jpg', new_image)  # Salva a imagem com máscara aplicada
-
-        # Coordenadas do retângulo
-        (x, y) = np.where(mask == 255)
-        (x1, y1) = (np.min(x), np.min(y))
-        (x2, y2) = (np.max(x), np.max(y))
-
-        # Adicionando um buffer
-        cropped_image = gray[x1:x2 + 3, y1:y2 + 3]
-        cv2.imwrite('./outputs/cropped_image.jpg', cropped_image)  # Salva a imagem recortada
-        plt.imshow(cropped_image, cmap='gray')
-        plt.title("Imagem Recortada")
-        plt.show()
-
-        return cropped_image
-
-    def read_text_from_image(self, image_path):
-        # Realiza o pré-processamento da imagem (recorte da placa)
-        cropped_image = self.process_image(image_path)
-
-        # Realizando OCR
-        results = []
-        decoders = ['beamsearch', 'wordbeamsearch', 'greedy']
-
-        for decoder in decoders:
-            logger.info(f"Realizando OCR com o decodificador {decoder}...")
-            result = self.reader.readtext(cropped_image, decoder=decoder)
-            results.extend(result)  # Adiciona os resultados da execução ao total
-
-        logger.info(f'OCR results (combined from 3 analyses): {results}')
-        return results
-
-    def filter_plates(self, results):
-        potential_plates = []
-        # Definindo o padrão de uma placa Mercosul (ex: ABC1D23)
-        plate_pattern = r'^[A-Z]{3}[0-9][A-Z][0-9]{2}$'
-
-        for result in results:
-            text, confidence = result[1], result[2]
-            logger.info(f'Extracted text: {text} | Confidence: {confidence}')
-            
-            # Verifica se o texto corresponde ao padrão e tem confiança acima de 0.3
-            if confidence > 0.3 and len(text) == 7 and re.match(plate_pattern, text):
-                potential_plates.append({
-                    'text': text,
-                    'confidence': confidence
-                })
-        return potential_plates if potential_plates else None
-
 # Função para verificar a placa no Adonis js
 def check_plate_in_database(plate):
-    try:
-        response = requests.get(f'http://localhost:3555/search-plate?plate={plate}')
-        data = response.json()
-        logger.info(f'Entrou na verificação de placas')
-        return data.get('message') == 'Placa cadastrada'
-    except requests.RequestException as e:
-        logger.error(f'Erro ao verificar placa: {e}')
-        return False
-
-@app.route('/upload', methods=['POST'])
-def upload_image():
-    if 'image' not in request.files:
-        return jsonify({'error': 'No image part in the request'}), 400
-
-    file = request.files['image']
-
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
-
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        logger.info(f'Image saved at {file_path}')
-
-        # Processar a imagem e realiza OCR
-        plate_analysis = PlateDataAnalysis()
-        texts = plate_analysis.read_text_from_image(file_path)  # Executa o OCR 3 vezes
-        text_plate = plate_analysis.filter_plates(texts)
+    return get_verification_client().check(plate)
+
+# Verifica em paralelo todas as placas candidatas (com cache e conexões reaproveitadas)
+def check_plates_in_database(plates):
+    return get_verification_client().verify_many(plates)
+
+# Estado de um upload ao longo das etapas do pipeline: sessão, caches, presença, OCR, verificação e caixas.
+# As etapas são separadas para que o servidor ASGI (asgi.py) execute o OCR em um executor e a verificação
+# com um cliente HTTP assíncrono.
+class UploadRequest:
+    def __init__(self, data, filename, camera_id=None, frame_key=None, debug_requested=False):
+        self.data = data
+        self.filename = filename
+        self.camera_id = camera_id
+        self.frame_key = camera_id or frame_key
+        self.debug_requested = debug_requested
+        self.session = None
+        self.key = None
+        self.image = None
+        self.frame_hash = None
+        self.debug = NO_DEBUG
+        self.texts = []
+        self.text_plate = None
+        self.localization = None
+        self.output_name = None
+
+    @classmethod
+    def from_frame(cls, image, filename, camera_id):
+        """
+        Quadro já decodificado (streams contínuos): sem cache por conteúdo e sem gravar em uploads/.
+        A imagem com as caixas sobrescreve um único arquivo por câmera, para que outputs/ não cresça
+        a cada quadro.
+        """
+        upload = cls(None, filename, camera_id)
+        upload.image = image
+        upload.output_name = f'stream_{secure_filename(camera_id)}.jpg'
+        return upload
+
+    def prepare(self):
+        """Etapas antes do OCR. Retorna (resposta, status) quando o upload já pode ser respondido, senão None."""
+        if self.data is not None:
+            # Upload idêntico a um já processado (reenvio, imagem de teste): devolve a resposta guardada
+            with stage('result_cache'):
+                self.key = content_key(self.data)
+                self.output_name = f'{self.key[:16]}_{self.filename}'
+                cached = result_cache.get(self.key) if RESULT_CACHE_ENABLED and not self.debug_requested else None
+            if cached is not None:
+                return dict(cached, cached=True), 200
+
+            # Decodifica o upload uma única vez em memória; gravar em disco é opcional e assíncrono
+            with stage('decode'):
+                self.image = decode_image_bytes(self.data)
+            if self.image is None:
+                return {'error': 'Failed to decode image'}, 400
+            save_upload_async(self.data, os.path.join(app.config['UPLOAD_FOLDER'], self.filename))
+        image = self.image
+
+        # Cena igual à do último quadro processado desta câmera: devolve o resultado anterior.
+        # O hash também indica à sessão da câmera quando a cena mudou de fato (outro veículo)
+        if DEDUP_ENABLED or self.camera_id:
+            with stage('dedup'):
+                self.frame_hash = dhash(image)
+                cached = frame_deduplicator.lookup(self.frame_key, self.frame_hash) if DEDUP_ENABLED else None
+            if cached is not None:
+                return dict(cached, duplicate_frame=True), 200
+
+        # Sem veículo na cena (subtração de fundo em miniatura): responde sem localizar nem fazer OCR
+        # e encerra a sessão, para que o próximo veículo comece uma nova
+        if PRESENCE_ENABLED and self.camera_id:
+            with stage('presence'):
+                present, foreground = presence_gate.check(self.camera_id, image)
+            if not present:
+                session_tracker.end(self.camera_id)
+                return {'status': 'no_vehicle', 'foreground_ratio': foreground}, 200
+
+        # Quadros da mesma câmera são agrupados por veículo;
+        # com a placa já decidida na sessão, o resultado é devolvido sem novo OCR
+        session = self.session = session_tracker.get(self.camera_id, self.frame_hash) if self.camera_id else None
+        if session is not None and session.decided and session.response is not None:
+            session.skipped += 1
+            return dict(session.response, session=session.info(skipped=True)), 200
+
+        # Depuração das etapas apenas quando pedida (?debug=1) ou amostrada
+        self.debug = StageDebugger.for_request(self.debug_requested)
+        return None
 
-        # Verificar se as placas estão cadastradas na API
+    def run_ocr(self):
+        # Processar a imagem e realiza OCR em um processo de OCR (quando configurado) ou neste processo.
+        # A depuração das etapas precisa das imagens intermediárias, então é sempre feita aqui.
+        if OCR_WORKERS and not self.debug.enabled:
+            with stage('ocr_worker'):
+                self.texts, text_plate, self.localization = get_ocr_workers().run(self.image)
+        else:
+            self.texts, text_plate, self.localization = ocr_frame(self.image, self.debug)
+
+        # Combina as leituras dos quadros da sessão por votação em cada caractere
+        if self.session is not None:
+            fused = self.session.update(text_plate)
+            if fused is not None:
+                text_plate = [fused]
+        self.text_plate = text_plate
+
+    def plate_texts(self):
+        return [plate['text'] for plate in self.text_plate] if self.text_plate else []
+
+    def finish(self, verification_results, output_url):
+        """
+        Monta a resposta a partir do resultado da verificação de plate_texts().
+        `output_url(nome)` gera a URL pública da imagem processada.
+        """
         plate_verifications = []
-        if text_plate:
-            for plate in text_plate:
-                verification_result = check_plate_in_database(plate['text'])
-                plate_verifications.append({
-                    'plate': plate['text'],
-                    'confidence': plate['confidence'],
-                    'verification': verification_result
-                })
+        for plate in self.text_plate or []:
+            result = verification_results[plate['text']]
+            plate_verifications.append({
+                'plate': plate['text'],
+                'confidence': plate['confidence'],
+                'format': plate['format'],
+                'verification': result['verification'],
+                'match': result['match'],
+                'distance': result['distance']
+            })
+            if result.get('error'):
+                plate_verifications[-1]['verification_error'] = True
 
         # Desenhar caixas nas letras detectadas
-        output_image_path = draw_boxes(file_path, texts)
+        # O nome da saída inclui o hash do conteúdo para que uploads diferentes com o mesmo nome não se sobrescrevam
+        with stage('draw_boxes'):
+            output_image_path = draw_boxes(self.image, self.texts, self.output_name)
 
         if output_image_path is None:
-            return jsonify({'error': 'Failed to process image'}), 500
+            return {'error': 'Failed to process image'}, 500
 
         response = {
-            'image_url': url_for('output_file', filename=output_image_path.split('/')[-1], _external=True),
-            'detected_texts': [{'text': item[1], 'confidence': item[2]} for item in texts],
-            'plates': plate_verifications if plate_verifications else 'No potential plates found'
+            'image_url': output_url(output_image_path.split('/')[-1]),
+            'detected_texts': [{'text': item[1], 'confidence': item[2]} for item in self.texts],
+            'plates': plate_verifications if plate_verifications else 'No potential plates found',
+            'localization': self.localization
         }
+        # Com a verificação de alguma placa falhando (API fora do ar, timeout), a resposta não é guardada:
+        # o próximo quadro ou reenvio refaz a verificação
+        reusable = not any(result.get('error') for result in verification_results.values())
+        if DEDUP_ENABLED and self.frame_hash is not None and reusable:
+            frame_deduplicator.store(self.frame_key, self.frame_hash, dict(response))
+        if RESULT_CACHE_ENABLED and self.data is not None and reusable:
+            result_cache.set(self.key, dict(response))
+        if self.session is not None:
+            if self.session.decided and self.session.response is None and reusable:
+                self.session.response = dict(response)
+            response['session'] = self.session.info()
+        if self.debug.enabled:
+            response['debug'] = self.debug.summary()
+
+        return response, 200
+
+# Pipeline completo de um upload. Retorna (resposta, status); precisa de um contexto
+# de requisição do Flask para gerar a URL da imagem processada.
+def process_upload(data, filename, camera_id=None, frame_key=None, debug_requested=False):
+    upload = UploadRequest(data, filename, camera_id, frame_key, debug_requested)
+    early = upload.prepare()
+    if early is not None:
+        return early
+
+    upload.run_ocr()
+
+    # Verificar se as placas estão cadastradas na API
+    plates = upload.plate_texts()
+    with stage('verify'):
+        verification_results = check_plates_in_database(plates) if plates else {}
+    return upload.finish(verification_results,
+                         lambda name: url_for('output_file', filename=name, _external=True))
+
+# Pipeline de um quadro de stream contínuo (stream_ingest): mesmas etapas do upload, com a câmera
+# sempre identificada; a URL da imagem processada é relativa, pois não há requisição HTTP
+def process_stream_frame(camera_id, image, filename):
+    with track_request() as timings:
+        upload = UploadRequest.from_frame(image, filename, camera_id)
+        early = upload.prepare()
+        if early is not None:
+            return early
+
+        upload.run_ocr()
+        plates = upload.plate_texts()
+        with stage('verify'):
+            verification_results = check_plates_in_database(plates) if plates else {}
+        response, status = upload.finish(verification_results, lambda name: f'/outputs/{name}')
+        response['timings'] = timings.as_dict()
+    return response, status
+
+stream_ingest = StreamIngest(process_stream_frame)
+
+# Valida o campo 'image' do formulário; retorna (nome, bytes) ou (None, resposta de erro)
+def read_upload():
+    if 'image' not in request.files:
+        return None, (jsonify({'error': 'No image part in the request'}), 400)
+
+    file = request.files['image']
+
+    if file.filename == '':
+        return None, (jsonify({'error': 'No selected file'}), 400)
+
+    if not allowed_file(file.filename):
+        return None, (jsonify({'error': 'File type not allowed'}), 400)
 
-        return jsonify(response), 200
+    return secure_filename(file.filename), file.read()
 
-    return jsonify({'error': 'File type not allowed'}), 400
+@app.route('/upload', methods=['POST'])
+def upload_image():
+    # Tempo de cada etapa vai no histograma de /metrics e no campo 'timings' da resposta
+    with track_request() as timings:
+        with stage('receive'):
+            filename, data = read_upload()
+        if filename is None:
+            return data
+
+        # Câmera informada pelo cabeçalho X-Camera-Id ou pelo campo camera_id
+        camera_id = request.headers.get('X-Camera-Id') or request.form.get('camera_id')
+        response, status = process_upload(data, filename, camera_id, request.remote_addr,
+                                          request.args.get('debug') == '1')
+        response['timings'] = timings.as_dict()
+    return jsonify(response), status
+
+# Sem leitor nem processo de OCR livre no tempo limite: o cliente tenta de novo em vez de receber 500
+@app.errorhandler(OCRBusy)
+def ocr_busy(error):
+    logger.warning(f'OCR ocupado: {error}')
+    return jsonify({'error': 'OCR is busy, try again later'}), 503, {'Retry-After': str(OCR_BUSY_RETRY_AFTER_S)}
+
+# Executa um trabalho da fila com um contexto de requisição para gerar as URLs
+def run_job(payload):
+    payload = dict(payload)
+    with app.test_request_context(base_url=payload.pop('base_url')), track_request() as timings:
+        try:
+            response, status = process_upload(**payload)
+        except OCRBusy as e:
+            logger.warning(f'OCR ocupado: {e}')
+            response, status = {'error': 'OCR is busy, try again later'}, 503
+        response['timings'] = timings.as_dict()
+    return response, status
+
+job_queue = JobQueue(run_job)
+
+# Rota para enfileirar um upload; o resultado é consultado em /jobs/<id> ou enviado ao callback
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    filename, data = read_upload()
+    if filename is None:
+        return data
+
+    camera_id = request.headers.get('X-Camera-Id') or request.form.get('camera_id')
+    callback_url = request.headers.get('X-Callback-Url') or request.form.get('callback_url')
+    if callback_url and not callback_allowed(callback_url):
+        return jsonify({'error': 'Callback URL not allowed'}), 400
+    job = job_queue.submit({
+        'data': data,
+        'filename': filename,
+        'camera_id': camera_id,
+        'frame_key': request.remote_addr,
+        'debug_requested': request.args.get('debug') == '1',
+        'base_url': request.host_url,
+    }, callback_url)
+    if job is None:
+        return jsonify({'error': 'Job queue is full'}), 429, {'Retry-After': '1'}
+
+    status_url = url_for('get_job', job_id=job.id, _external=True)
+    return jsonify({'id': job.id, 'status': job.status, 'status_url': status_url}), 202, {'Location': status_url}
+
+# Rota para consultar um trabalho; ?wait=N aguarda até N segundos pela conclusão (long-poll)
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    wait = request.args.get('wait', type=float)
+    if wait:
+        job_queue.wait(job, wait)
+    return jsonify(job.info()), 200
+
+# Rota com os contadores da fila de trabalhos
+@app.route('/jobs')
+def jobs_metrics():
+    return jsonify(job_queue.metrics()), 200
+
+# Indicadores exportados em /metrics além dos histogramas de latência por etapa
+def collect_metrics():
+    cache = result_cache.metrics()
+    dedup = frame_deduplicator.metrics()
+    presence = presence_gate.metrics()
+    verification = get_verification_client().metrics()
+    lookups = verification['cache_hits'] + verification['cache_misses']
+    jobs = job_queue.metrics()
+    streams = stream_ingest.metrics()['streams']
+    gauges = [
+        ('plate_ocr_result_cache_hit_ratio', 'Fração de uploads respondidos pelo cache de resultados', cache['hit_ratio']),
+        ('plate_ocr_result_cache_size', 'Respostas no cache de resultados', cache['size']),
+        ('plate_ocr_frame_dedup_hit_ratio', 'Fração de quadros repetidos', dedup['hit_ratio']),
+        ('plate_ocr_presence_empty_ratio', 'Fração de quadros sem veículo', presence['empty_ratio']),
+        ('plate_ocr_verification_cache_hit_ratio', 'Fração de verificações respondidas pelo cache',
+         verification['cache_hits'] / lookups if lookups else 0.0),
+        ('plate_ocr_jobs_pending', 'Trabalhos aguardando na fila', jobs['pending']),
+        ('plate_ocr_jobs_rejected', 'Trabalhos recusados com a fila cheia', jobs['rejected']),
+        ('plate_ocr_streams_connected', 'Streams contínuos conectados', sum(s['connected'] for s in streams)),
+        ('plate_ocr_stream_frames_dropped', 'Quadros de streams descartados por um mais recente',
+         sum(s['dropped'] for s in streams)),
+    ]
+    if OCR_WORKERS:
+        workers = get_ocr_workers().metrics()
+        gauges += [
+            ('plate_ocr_workers_busy', 'Processos de OCR ocupados', workers['busy']),
+            ('plate_ocr_workers_alive', 'Processos de OCR vivos', workers['alive']),
+            ('plate_ocr_workers_restarts', 'Reinícios de processos de OCR', workers['restarts']),
+        ]
+    else:
+        pool = get_reader_pool().metrics()
+        gauges += [
+            ('plate_ocr_reader_pool_in_use', 'Leitores OCR em uso', pool['in_use']),
+            ('plate_ocr_reader_pool_wait_avg_seconds', 'Espera média por um leitor OCR', pool['wait_avg_seconds']),
+            ('plate_ocr_reader_pool_wait_max_seconds', 'Maior espera por um leitor OCR', pool['wait_max_seconds']),
+        ]
+    return render_metrics(gauges)
+
+# Métricas no formato de texto do Prometheus
+@app.route('/metrics')
+def metrics():
+    return Response(collect_metrics(), mimetype='text/plain; version=0.0.4')
+
+# Rota com as métricas do pool de leitores OCR
+@app.route('/ocr-pool')
+def ocr_pool_metrics():
+    return jsonify(get_reader_pool().metrics()), 200
+
+# Rota com o estado dos processos de OCR
+@app.route('/ocr-workers')
+def ocr_workers_metrics():
+    if not OCR_WORKERS:
+        return jsonify({'workers': 0}), 200
+    return jsonify(get_ocr_workers().metrics()), 200
+
+# Rota com os contadores da supressão de quadros repetidos
+@app.route('/frame-dedup')
+def frame_dedup_metrics():
+    return jsonify(frame_deduplicator.metrics()), 200
+
+# Rota com os contadores do cache de resultados por conteúdo
+@app.route('/result-cache')
+def result_cache_metrics():
+    return jsonify(result_cache.metrics()), 200
+
+# Rota com os contadores do detector de presença de veículo
+@app.route('/presence')
+def presence_metrics():
+    return jsonify(presence_gate.metrics()), 200
+
+# Rota com o estado dos streams contínuos; POST inicia (ou substitui) o stream de uma câmera
+# com os campos camera_id, url e, opcionalmente, sample_fps, apenas para URLs de STREAM_URLS ou
+# STREAM_ALLOWED_URLS; DELETE /streams/<camera_id> encerra
+@app.route('/streams', methods=['GET', 'POST'])
+def streams():
+    if request.method == 'POST':
+        camera_id = request.form.get('camera_id')
+        url = request.form.get('url')
+        if not camera_id or not url:
+            return jsonify({'error': 'camera_id and url are required'}), 400
+        if not stream_source_allowed(url):
+            return jsonify({'error': 'Stream URL not allowed'}), 403
+        consumer = stream_ingest.add(camera_id, url, request.form.get('sample_fps', STREAM_SAMPLE_FPS, type=float))
+        return jsonify(consumer.metrics()), 201
+    return jsonify(stream_ingest.metrics()), 200
+
+@app.route('/streams/<camera_id>', methods=['DELETE'])
+def stop_stream(camera_id):
+    if not stream_ingest.remove(camera_id):
+        return jsonify({'error': 'Stream not found'}), 404
+    return '', 204
 
 # Rota para servir arquivos de imagem carregados
 @app.route('/uploads/<filename>')
@@ -224,9 +448,25 @@ def uploaded_file(filename):
 def output_file(filename):
     return send_from_directory('./outputs', filename)
 
-if __name__ == '__main__':
+# Prepara as pastas e carrega os recursos pesados antes de aceitar requisições
+def warm_up():
     if not os.path.exists(UPLOAD_FOLDER):
         os.makedirs(UPLOAD_FOLDER)
     if not os.path.exists('./outputs'):
         os.makedirs('./outputs')
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Carrega e aquece os leitores OCR antes de aceitar requisições;
+    # com OCR_WORKERS, os leitores ficam nos processos de OCR e este processo só atende o HTTP
+    if OCR_WORKERS:
+        get_ocr_workers()
+    else:
+        get_reader_pool()
+    # Carrega o índice local de placas (quando PLATE_INDEX_URL estiver configurado)
+    get_verification_client()
+    # Inicia os streams contínuos de STREAM_URLS
+    stream_ingest.start_configured()
+
+if __name__ == '__main__':
+    warm_up()
+    # Sem o recarregador do modo debug, que executaria warm_up() de novo: um segundo pool de leitores
+    # ou um segundo conjunto de processos de OCR
+    app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=False)